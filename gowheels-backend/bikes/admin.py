@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Bike, Booking, UserProfile, OTPVerification
+from .models import Bike, Booking, BookingArchive, SeasonalRate, UserProfile, OTPVerification
+from . import export
 
 # NEW: UserProfile Admin
 @admin.register(UserProfile)
@@ -19,6 +20,11 @@ class UserProfileAdmin(admin.ModelAdmin):
         self.message_user(request, f"{queryset.count()} Aadhaar card(s) unverified!")
     unverify_aadhaar.short_description = "❌ Unverify Aadhaar Cards"
 
+class SeasonalRateInline(admin.TabularInline):
+    model = SeasonalRate
+    extra = 0
+    fields = ['name', 'start_date', 'end_date', 'price_per_day']
+
 # UPDATED: Bike Admin (with your existing + new verification fields)
 @admin.register(Bike)
 class BikeAdmin(admin.ModelAdmin):
@@ -43,7 +49,8 @@ class BikeAdmin(admin.ModelAdmin):
     ]
     search_fields = ['title', 'owner__username', 'number_plate', 'location']
     readonly_fields = ['created_at', 'updated_at']
-    actions = ['verify_bikes', 'reject_bikes', 'mark_pending']
+    actions = ['verify_bikes', 'reject_bikes', 'mark_pending', 'export_csv']
+    inlines = [SeasonalRateInline]
     
     fieldsets = (
         ('Basic Information', {
@@ -66,19 +73,23 @@ class BikeAdmin(admin.ModelAdmin):
     )
     
     def verify_bikes(self, request, queryset):
-        updated = queryset.update(is_verified=True, verification_status='verified')
+        updated = queryset.set_verification('verified')
         self.message_user(request, f"{updated} bike(s) verified successfully! ✅")
     verify_bikes.short_description = "✅ Verify Selected Bikes"
     
     def reject_bikes(self, request, queryset):
-        updated = queryset.update(is_verified=False, verification_status='rejected')
+        updated = queryset.set_verification('rejected')
         self.message_user(request, f"{updated} bike(s) rejected! ❌")
     reject_bikes.short_description = "❌ Reject Selected Bikes"
     
     def mark_pending(self, request, queryset):
-        updated = queryset.update(is_verified=False, verification_status='pending')
+        updated = queryset.set_verification('pending')
         self.message_user(request, f"{updated} bike(s) marked as pending! ⏳")
     mark_pending.short_description = "⏳ Mark as Pending"
+    
+    def export_csv(self, request, queryset):
+        return export.response('bikes', 'csv', [queryset])
+    export_csv.short_description = "📄 Export as CSV"
 
 # UPDATED: Booking Admin
 @admin.register(Booking)
@@ -96,7 +107,7 @@ class BookingAdmin(admin.ModelAdmin):
     list_filter = ['status', 'created_at', 'start_date']
     search_fields = ['renter__username', 'bike__title']
     readonly_fields = ['created_at']
-    actions = ['confirm_bookings', 'cancel_bookings', 'complete_bookings']
+    actions = ['confirm_bookings', 'cancel_bookings', 'complete_bookings', 'export_csv']
     
     fieldsets = (
         ('Booking Details', {
@@ -112,19 +123,23 @@ class BookingAdmin(admin.ModelAdmin):
     )
     
     def confirm_bookings(self, request, queryset):
-        updated = queryset.update(status='confirmed')
+        updated = queryset.update_status('confirmed')
         self.message_user(request, f"{updated} booking(s) confirmed! ✅")
     confirm_bookings.short_description = "✅ Confirm Bookings"
     
     def cancel_bookings(self, request, queryset):
-        updated = queryset.update(status='cancelled')
+        updated = queryset.update_status('cancelled')
         self.message_user(request, f"{updated} booking(s) cancelled! ❌")
     cancel_bookings.short_description = "❌ Cancel Bookings"
     
     def complete_bookings(self, request, queryset):
-        updated = queryset.update(status='completed')
+        updated = queryset.update_status('completed')
         self.message_user(request, f"{updated} booking(s) completed! 🎉")
     complete_bookings.short_description = "🎉 Mark as Completed"
+    
+    def export_csv(self, request, queryset):
+        return export.response('bookings', 'csv', [queryset])
+    export_csv.short_description = "📄 Export as CSV"
 
 # NEW: OTP Verification Admin (for debugging)
 @admin.register(OTPVerification)
@@ -136,4 +151,17 @@ class OTPVerificationAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
     
     # Make it easier to see recent OTPs
-    date_hierarchy = 'created_at'
\ No newline at end of file
+    date_hierarchy = 'created_at'
+
+@admin.register(BookingArchive)
+class BookingArchiveAdmin(admin.ModelAdmin):
+    list_display = ['id', 'renter', 'bike', 'start_date', 'end_date', 'total_price', 'status', 'archived_at']
+    list_filter = ['status']
+    search_fields = ['renter__username', 'bike__title']
+    list_select_related = ['renter', 'bike']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.core.management import call_command
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    from .search import install_fts
+    install_fts(connections[using])
+
+
+def ensure_cache_tables(sender, using, **kwargs):
+    # Database cache backends (the OTP store without Redis) need their table
+    call_command('createcachetable', database=using, verbosity=0)
 
 
 class BikesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bikes'
+
+    def ready(self):
+        from . import receivers  # noqa: F401
+        post_migrate.connect(ensure_search_index, sender=self)
+        post_migrate.connect(ensure_cache_tables, sender=self)
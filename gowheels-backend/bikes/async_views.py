@@ -0,0 +1,205 @@
+# bikes/async_views.py
+"""
+Async-native versions of the hot read endpoints and of the OTP endpoints.
+
+They answer under /api/async/ with the same query parameters, status codes
+and JSON bodies as their DRF counterparts, but read through Django's async
+ORM (async for, aget, aexists, aaggregate), so under ASGI (see
+core/asgi.py) one worker keeps serving requests while others wait on the
+database. ``manage.py bench_asgi`` compares them with the WSGI path.
+
+These are plain async Django views: endpoint() authenticates the JWT,
+turns DRF exceptions into the usual error bodies and hands the view a DRF
+Request for query_params and data. Conditional GETs work as on the sync
+views; anonymous responses are not put in the cache.py response cache,
+whose version counters are sync-only.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import Http404, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .conditional import aconditional_read
+from .fast_serializers import BikeRows, BookingRows
+from .fieldsets import Shape
+from .filters import BikeFilterBackend, deciding_bookings
+from .models import Bike, Booking, UserProfile
+from .otp_service import OTPService
+from .pagination import BikeCursorPagination
+from .renderers import FastJSONRenderer
+from .views import client_ip
+
+RENDERER = FastJSONRenderer()
+BOOKING_TIMESTAMPS = ('updated_at', 'bike__updated_at')
+
+
+async def authenticate(request):
+    """JWTAuthentication.authenticate() with the user read through the async ORM"""
+    jwt = JWTAuthentication()
+    header = jwt.get_header(request)
+    raw_token = jwt.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return AnonymousUser()
+
+    token = jwt.get_validated_token(raw_token)
+    try:
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken('Token contained no recognizable user identification')
+    try:
+        user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        raise AuthenticationFailed('User not found', code='user_not_found')
+    if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+    if jwt_settings.CHECK_REVOKE_TOKEN and \
+            token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+        raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+    return user
+
+
+def render(data, status=200):
+    return HttpResponse(RENDERER.render(data), status=status, content_type=RENDERER.media_type)
+
+
+def handle_exception(request, exc):
+    """The response DRF's APIView.handle_exception() would give, or None to re-raise"""
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        exc.auth_header = JWTAuthentication().authenticate_header(request)
+    response = exception_handler(exc, {'request': request})
+    if response is None:
+        return None
+    rendered = render(response.data, response.status_code)
+    for name in ('WWW-Authenticate', 'Retry-After'):
+        if response.has_header(name):
+            rendered[name] = response[name]
+    return rendered
+
+
+def endpoint(methods, authenticated=False):
+    """
+    Make an async view(request, **kwargs) an API endpoint, as @api_view does.
+
+    The view gets a DRF Request whose user is already authenticated;
+    authenticated=True answers anonymous requests with 401.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @require_http_methods(methods)
+        @wraps(view)
+        async def wrapper(request, **kwargs):
+            request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+            request.accepted_renderer = RENDERER
+            try:
+                request.user = await authenticate(request)
+                if authenticated and not request.user.is_authenticated:
+                    raise NotAuthenticated()
+                return await view(request, **kwargs)
+            except Exception as exc:
+                response = handle_exception(request, exc)
+                if response is None:
+                    raise
+                return response
+        return wrapper
+    return decorator
+
+
+def filter_bikes(request, queryset):
+    return BikeFilterBackend().filter_queryset(request, queryset, None)
+
+
+@endpoint(['GET', 'HEAD'])
+@aconditional_read(lambda request: filter_bikes(request, Bike.objects.all()), get_related=deciding_bookings)
+async def bike_list(request):
+    """GET /api/bikes/"""
+    rows = BikeRows(request, Shape.from_request(request))
+    paginator = BikeCursorPagination()
+    page = await paginator.apaginate_queryset(rows.values(filter_bikes(request, Bike.objects.all())), request)
+    return render(paginator.get_paginated_data(rows.serialize(page)))
+
+
+@endpoint(['GET', 'HEAD'])
+@aconditional_read(lambda request, pk: filter_bikes(request, Bike.objects.filter(pk=pk)),
+                   get_related=deciding_bookings)
+async def bike_detail(request, pk):
+    """GET /api/bikes/<pk>/"""
+    rows = BikeRows(request, Shape.from_request(request))
+    row = await rows.values(filter_bikes(request, Bike.objects.filter(pk=pk))).afirst()
+    if row is None:
+        raise Http404('No Bike matches the given query.')
+    return render(rows.build(row))
+
+
+async def _bookings(request, queryset):
+    rows = BookingRows(request, Shape.from_request(request))
+    return render(rows.serialize([row async for row in rows.values(queryset)]))
+
+
+@endpoint(['GET', 'HEAD'], authenticated=True)
+@aconditional_read(lambda request: Booking.objects.filter(renter=request.user), timestamp_fields=BOOKING_TIMESTAMPS)
+async def my_bookings(request):
+    """GET /api/bookings/my_bookings/"""
+    return await _bookings(request, Booking.objects.filter(renter=request.user))
+
+
+@endpoint(['GET', 'HEAD'], authenticated=True)
+@aconditional_read(lambda request: Booking.objects.filter(bike__owner=request.user),
+                   timestamp_fields=BOOKING_TIMESTAMPS)
+async def my_rentals(request):
+    """GET /api/bookings/my_rentals/"""
+    return await _bookings(request, Booking.objects.filter(bike__owner=request.user))
+
+
+@endpoint(['POST'])
+async def send_otp(request):
+    """POST /api/send-otp/"""
+    phone_number = request.data.get('phone_number')
+
+    if not phone_number or len(phone_number) != 10:
+        return render({'error': 'Valid 10-digit phone number required'}, status=400)
+
+    if await UserProfile.objects.filter(phone_number=phone_number, phone_verified=True).aexists():
+        return render({'error': 'This phone number is already registered'}, status=400)
+
+    # Codes and rate limits live in the OTP cache, whose backends are sync
+    otp = await sync_to_async(OTPService.issue)(phone_number, client_ip(request))
+
+    # Only enqueues (see sms.py), so it does not block the event loop
+    if OTPService.send_otp_msg91(phone_number, otp):
+        return render({'message': 'OTP sent successfully to ' + phone_number, 'phone_number': phone_number})
+    return render({'error': 'Failed to send OTP. Please try again.'}, status=500)
+
+
+@endpoint(['POST'])
+async def verify_otp(request):
+    """POST /api/verify-otp/"""
+    phone_number = request.data.get('phone_number')
+    otp = request.data.get('otp')
+    user_id = request.data.get('user_id')
+
+    if not phone_number or not otp or \
+            not await sync_to_async(OTPService.verify)(phone_number, otp, client_ip(request)):
+        return render({'error': 'Invalid or expired OTP. Please try again or request a new one.'}, status=400)
+
+    if user_id:
+        try:
+            user = await User.objects.aget(id=user_id)
+        except User.DoesNotExist:
+            return render({'error': 'User not found'}, status=404)
+        profile, created = await UserProfile.objects.aget_or_create(user=user)
+        profile.phone_number = phone_number
+        profile.phone_verified = True
+        await profile.asave()
+
+    return render({'message': 'Phone number verified successfully! ✅', 'verified': True})
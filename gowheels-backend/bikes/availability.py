@@ -0,0 +1,97 @@
+# bikes/availability.py
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+
+from .models import Bike, BikeOccupancy, Booking
+from .sqlite import write_transaction
+
+
+def refresh_occupancy(bike_id, ranges):
+    """
+    Recompute the occupancy bits of one bike for the given date ranges.
+
+    Only bookings overlapping those ranges are read, so the cost is bounded by
+    the size of the change rather than the bike's booking history.
+    """
+    ranges = [(start, end) for start, end in ranges if end > start]
+    if not ranges:
+        return
+    with write_transaction():
+        occupancy = BikeOccupancy.objects.select_for_update().filter(bike_id=bike_id).first()
+        if occupancy is None:
+            if not Bike.objects.filter(pk=bike_id).exists():
+                return  # bike is being deleted
+            occupancy = BikeOccupancy(bike_id=bike_id)
+
+        window_start = min(start for start, _ in ranges)
+        window_end = max(end for _, end in ranges)
+        window = BikeOccupancy.range_mask(window_start, window_end)
+
+        booked = 0
+        held = Booking.objects.active().overlapping(window_start, window_end).filter(bike_id=bike_id)
+        for start, end in held.values_list('start_date', 'end_date'):
+            booked |= BikeOccupancy.range_mask(start, end)
+
+        occupancy.bits = (occupancy.bits & ~window) | (booked & window)
+        occupancy.save()
+
+
+def refresh_occupancy_for(bookings):
+    """Refresh occupancy for (bike_id, start_date, end_date) rows, one pass per bike"""
+    by_bike = defaultdict(list)
+    for bike_id, start, end in bookings:
+        by_bike[bike_id].append((start, end))
+    for bike_id, ranges in by_bike.items():
+        refresh_occupancy(bike_id, ranges)
+
+
+def rebuild_occupancy(bike_id):
+    """Recompute a bike's whole bitmap from its active bookings"""
+    BikeOccupancy.objects.filter(bike_id=bike_id).delete()
+    ranges = Booking.objects.active().filter(bike_id=bike_id).values_list('start_date', 'end_date')
+    refresh_occupancy(bike_id, list(ranges))
+
+
+def tracked(start_date):
+    """Whether the bitmaps cover a range starting on start_date"""
+    return start_date >= BikeOccupancy.EPOCH
+
+
+def busy_bikes(start_date, end_date):
+    """Ids of bikes whose bitmap has any day of [start_date, end_date) booked"""
+    mask = BikeOccupancy.range_mask(start_date, end_date)
+    return [
+        bike_id for bike_id, bitmap in BikeOccupancy.objects.values_list('bike_id', 'bitmap')
+        if int.from_bytes(bitmap, 'little') & mask
+    ]
+
+
+def looks_free(bike_id, start_date, end_date):
+    """
+    The bitmap's answer, without locks; bits of a deleted booking linger until
+    its transaction commits, so only a row query can be relied on
+    """
+    if not tracked(start_date):
+        return True
+    occupancy = BikeOccupancy.objects.filter(bike_id=bike_id).only('bitmap').first()
+    return occupancy is None or occupancy.is_free(start_date, end_date)
+
+
+def add_months(day, months):
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def occupancy_calendar(bike_id, start_date, end_date):
+    """Booked and free days of a bike in [start_date, end_date)"""
+    bitmap = BikeOccupancy.objects.filter(bike_id=bike_id).values_list('bitmap', flat=True).first()
+    bits = int.from_bytes(bitmap or b'', 'little')
+    booked, free = [], []
+    day = start_date
+    while day < end_date:
+        index = (day - BikeOccupancy.EPOCH).days
+        (booked if index >= 0 and bits >> index & 1 else free).append(day)
+        day += timedelta(days=1)
+    return booked, free
@@ -0,0 +1,148 @@
+# bikes/booking_service.py
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+
+from . import pricing
+from .availability import looks_free
+from .models import Bike, Booking
+from .sqlite import retry_on_lock, write_transaction
+
+
+class BookingConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'This bike is already booked for some of the selected dates.'
+    default_code = 'booking_conflict'
+
+
+# SQLite has no row locks and lets only one writer in at a time anyway, so
+# booking writes in this process queue on a single lock instead.
+_sqlite_write_lock = threading.Lock()
+
+
+@contextmanager
+def _serialize_without_row_locks():
+    if connection.features.has_select_for_update:
+        yield
+    else:
+        with _sqlite_write_lock:
+            yield
+
+
+class BookingService:
+
+    @staticmethod
+    def quote(bike, start_date, end_date):
+        """Total price for renting bike over [start_date, end_date), see bikes/pricing.py"""
+        return pricing.booking_quote(bike, start_date, end_date).total
+
+    @staticmethod
+    @retry_on_lock
+    def create_booking(renter, bike_id, start_date, end_date):
+        """
+        Create a pending booking, or raise BookingConflict if the dates
+        overlap an active booking of the same bike.
+
+        The bike row is locked (SELECT ... FOR UPDATE) for the duration of the
+        transaction, so conflicting requests for one bike run one after the
+        other while bookings for different bikes proceed in parallel.
+        """
+        BookingService._precheck(bike_id, start_date, end_date)
+        with _serialize_without_row_locks(), write_transaction():
+            bike = BookingService._lock_free_bike(bike_id, start_date, end_date)
+            return Booking.objects.create(
+                bike=bike,
+                renter=renter,
+                start_date=start_date,
+                end_date=end_date,
+                total_price=BookingService.quote(bike, start_date, end_date),
+            )
+
+    @staticmethod
+    @retry_on_lock
+    def reschedule_booking(booking, bike_id, start_date, end_date):
+        """
+        Move an active booking to other dates (or another bike) and reprice
+        it, under the same lock and overlap check as create_booking.
+        """
+        if booking.status not in Booking.ACTIVE_STATUSES:
+            raise ValidationError({'status': f'A {booking.status} booking cannot be changed.'})
+        BookingService._precheck(bike_id, start_date, end_date, exclude=booking.pk)
+        with _serialize_without_row_locks(), write_transaction():
+            booking.bike = BookingService._lock_free_bike(bike_id, start_date, end_date, exclude=booking.pk)
+            booking.start_date = start_date
+            booking.end_date = end_date
+            booking.total_price = BookingService.quote(booking.bike, start_date, end_date)
+            booking.save()
+            return booking
+
+    @staticmethod
+    def _precheck(bike_id, start_date, end_date, exclude=None):
+        """
+        Turn away clearly clashing requests before queueing for the lock: the
+        bitmap says whether to look, the bookings (unlocked) confirm it
+        """
+        if looks_free(bike_id, start_date, end_date):
+            return
+        clash = Booking.objects.active().overlapping(start_date, end_date).filter(bike_id=bike_id).exclude(pk=exclude)
+        if clash.exists():
+            raise BookingConflict()
+
+    @staticmethod
+    def _lock_free_bike(bike_id, start_date, end_date, exclude=None):
+        """The locked bike row, if no other active booking overlaps the dates"""
+        try:
+            bike = Bike.objects.select_for_update().get(pk=bike_id)
+        except Bike.DoesNotExist:
+            raise NotFound('Bike not found.')
+
+        clash = Booking.objects.active().overlapping(start_date, end_date).filter(bike=bike).exclude(pk=exclude)
+        if clash.exists():
+            raise BookingConflict()
+        return bike
+
+    @staticmethod
+    def transition_many(booking_ids, new_status, batch_size=None):
+        """
+        Move bookings to new_status where Booking.TRANSITIONS allows it.
+
+        Ids are handled in chunks of BOOKING_TRANSITION_BATCH_SIZE, each in one
+        transaction with a single UPDATE, so the bookings_bulk_updated
+        receivers (availability, stats, caches) run once per chunk. Returns one
+        {'id', 'status', 'ok', 'error'} result per distinct id, in order.
+        """
+        ids = list(dict.fromkeys(booking_ids))
+        size = batch_size or getattr(settings, 'BOOKING_TRANSITION_BATCH_SIZE', 500)
+        results = []
+        for offset in range(0, len(ids), size):
+            results += BookingService._transition_chunk(ids[offset:offset + size], new_status)
+        return results
+
+    @staticmethod
+    @retry_on_lock
+    def _transition_chunk(chunk, new_status):
+        results = []
+        with _serialize_without_row_locks(), write_transaction():
+            current = dict(
+                Booking.objects.select_for_update().filter(pk__in=chunk).values_list('pk', 'status')
+            )
+            allowed = []
+            for pk in chunk:
+                status = current.get(pk)
+                if status is None:
+                    results.append({'id': pk, 'status': None, 'ok': False, 'error': 'Booking not found.'})
+                elif status == new_status:
+                    results.append({'id': pk, 'status': status, 'ok': True, 'error': None})
+                elif new_status not in Booking.TRANSITIONS[status]:
+                    results.append({'id': pk, 'status': status, 'ok': False,
+                                    'error': f'Cannot go from {status} to {new_status}.'})
+                else:
+                    allowed.append(pk)
+                    results.append({'id': pk, 'status': new_status, 'ok': True, 'error': None})
+            if allowed:
+                Booking.objects.filter(pk__in=allowed).update_status(new_status)
+        return results
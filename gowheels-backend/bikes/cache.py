@@ -0,0 +1,159 @@
+# bikes/cache.py
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from .db_router import PRIMARY, reading_from
+
+LIST_VERSION_KEY = 'bikes:version:list'
+BIKE_VERSION_KEY = 'bikes:version:bike:{}'
+HITS_KEY = 'bikes:metrics:hits'
+MISSES_KEY = 'bikes:metrics:misses'
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+
+
+def get_cache():
+    return caches[getattr(settings, 'BIKE_CACHE_ALIAS', 'default')]
+
+
+def _fresh_version():
+    # A version key that was evicted must not restart at a value an older
+    # cached response was stored under, so new versions start from the clock
+    return int(time.time() * 1000)
+
+
+def _bump(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _fresh_version(), None)
+
+
+def _invalidate(keys):
+    def bump_all():
+        cache = get_cache()
+        for key in keys:
+            _bump(cache, key)
+
+    bump_all()
+    # A read between this bump and the commit can still cache the old rows,
+    # so bump once more when the transaction is over
+    if connection.in_atomic_block:
+        transaction.on_commit(bump_all)
+
+
+def invalidate_lists():
+    """Drop every cached bike list (new rows, availability or verification changes)"""
+    _invalidate([LIST_VERSION_KEY])
+
+
+def invalidate_bikes(bike_ids):
+    """Drop cached details of the given bikes, and every cached list"""
+    _invalidate([LIST_VERSION_KEY] + [BIKE_VERSION_KEY.format(bike_id) for bike_id in set(bike_ids)])
+
+
+def _versions(cache, keys):
+    versions = cache.get_many(keys)
+    missing = {key: _fresh_version() for key in keys if key not in versions}
+    for key, value in missing.items():
+        # add() so a concurrent initialisation wins and both agree
+        if not cache.add(key, value, None):
+            missing[key] = cache.get(key, value)
+    versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bike_versions(bike_ids):
+    """{bike_id: version} for keys of other per-bike cached data (see pricing.py)"""
+    bike_ids = list(bike_ids)
+    keys = [BIKE_VERSION_KEY.format(bike_id) for bike_id in bike_ids]
+    return dict(zip(bike_ids, _versions(get_cache(), keys)))
+
+
+def response_key(request, scope, version_keys):
+    cache = get_cache()
+    versions = _versions(cache, version_keys)
+    params = sorted(request.query_params.lists())
+    # The version keys need not tell two bikes apart (counters start from
+    # the clock), the path does. Absolute media URLs depend on the host.
+    raw = repr((request.build_absolute_uri('/'), request.path, request.accepted_renderer.format, params))
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    return f"bikes:response:{scope}:{'.'.join(map(str, versions))}:{digest}"
+
+
+def record(hit):
+    cache, key = get_cache(), HITS_KEY if hit else MISSES_KEY
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def stats():
+    cache = get_cache()
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counts.get(HITS_KEY, 0), counts.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+def cache_anonymous_read(scope):
+    """
+    Cache successful anonymous responses of a viewset read action.
+
+    Keys embed version counters, so invalidation is a counter bump instead
+    of a key scan: lists depend on the list version, details on their
+    bike's own version.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return view_method(self, request, *args, **kwargs)
+
+            if 'pk' in kwargs:
+                version_keys = [BIKE_VERSION_KEY.format(kwargs['pk'])]
+            else:
+                version_keys = [LIST_VERSION_KEY]
+            key = response_key(request, scope, version_keys)
+
+            cache = get_cache()
+            cached = cache.get(key)
+            if cached is not None:
+                record(hit=True)
+                data, headers = cached
+                # Validators were stored with the body, so revalidation is free too
+                not_modified = get_conditional_response(
+                    request,
+                    etag=headers.get('ETag'),
+                    last_modified=parse_http_date_safe(headers.get('Last-Modified', '')),
+                )
+                response = not_modified or Response(data)
+                for name, value in headers.items():
+                    response[name] = value
+                response['X-Cache'] = 'HIT'
+                return response
+
+            record(hit=False)
+            # A cached body outlives any replica lag, so it is built from the primary
+            with reading_from(PRIMARY):
+                response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+                cache.set(key, (response.data, headers), getattr(settings, 'BIKE_CACHE_TIMEOUT', 300))
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,126 @@
+# bikes/conditional.py
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max, Subquery, Value
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def _related_total(related, aggregate):
+    # Uncorrelated, so the database evaluates it once; Max() only lets it
+    # into the aggregate query
+    whole = related.order_by().annotate(whole=Value(1)).values('whole')
+    return Max(Subquery(whole.annotate(total=aggregate).values('total')))
+
+
+def _aggregates(timestamp_fields, related=None):
+    aggregates = {'rows': Count('pk')}
+    aggregates.update({f'max_{i}': Max(field) for i, field in enumerate(timestamp_fields)})
+    if related is not None:
+        aggregates['related_rows'] = _related_total(related, Count('pk'))
+        aggregates['related_max'] = _related_total(related, Max('updated_at'))
+    return aggregates
+
+
+def _validators(request, result, timestamp_fields):
+    timestamps = [result[f'max_{i}'] for i in range(len(timestamp_fields))]
+    if 'related_max' in result:
+        timestamps.append(result['related_max'])
+    known = [stamp for stamp in timestamps if stamp is not None]
+    last_modified = max(known) if known else None
+
+    raw = repr((
+        request.build_absolute_uri(),
+        request.user.pk,
+        request.accepted_renderer.format,
+        result['rows'],
+        result.get('related_rows'),
+        [stamp.isoformat() if stamp else None for stamp in timestamps],
+    ))
+    etag = quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+    return etag, last_modified, result['rows']
+
+
+def validators(request, queryset, timestamp_fields, related=None):
+    """
+    ETag and Last-Modified for a response built from queryset.
+
+    Both come from one aggregate query (row count plus the newest timestamp of
+    each field), so they are cheap next to serializing the rows. The full URL,
+    the user and the response format are folded into the ETag because they
+    change the body too. related, if given, holds other rows (with an
+    updated_at) that decide which rows are in queryset; their count and
+    newest timestamp are taken in the same query.
+    """
+    result = queryset.order_by().aggregate(**_aggregates(timestamp_fields, related))
+    return _validators(request, result, timestamp_fields)
+
+
+async def avalidators(request, queryset, timestamp_fields, related=None):
+    """validators() through the async ORM"""
+    result = await queryset.order_by().aaggregate(**_aggregates(timestamp_fields, related))
+    return _validators(request, result, timestamp_fields)
+
+
+def conditional_read(get_queryset, timestamp_fields=('updated_at',), get_related=None):
+    """
+    Answer If-None-Match / If-Modified-Since with 304 before any serialization.
+
+    get_queryset(view, request, **kwargs) returns the rows the response is
+    built from; timestamp_fields are the fields whose newest value dates it.
+    get_related(view, request, **kwargs), if given, returns the related rows
+    of validators(), or None.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_method(self, request, *args, **kwargs)
+
+            queryset = get_queryset(self, request, **kwargs)
+            related = get_related(self, request, **kwargs) if get_related else None
+            etag, last_modified, rows = validators(request, queryset, timestamp_fields, related)
+            if 'pk' in kwargs and not rows:
+                # Let the view produce its 404
+                return view_method(self, request, *args, **kwargs)
+
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if not_modified is not None:
+                return not_modified
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = etag
+                if timestamp is not None:
+                    response['Last-Modified'] = http_date(timestamp)
+            return response
+        return wrapper
+    return decorator
+
+
+def aconditional_read(get_queryset, timestamp_fields=('updated_at',), get_related=None):
+    """conditional_read() for the async views, called as view(request, **kwargs)"""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, **kwargs):
+            queryset = get_queryset(request, **kwargs)
+            related = get_related(request, **kwargs) if get_related else None
+            etag, last_modified, rows = await avalidators(request, queryset, timestamp_fields, related)
+            if 'pk' in kwargs and not rows:
+                return await view(request, **kwargs)
+
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if not_modified is not None:
+                return not_modified
+
+            response = await view(request, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = etag
+                if timestamp is not None:
+                    response['Last-Modified'] = http_date(timestamp)
+            return response
+        return wrapper
+    return decorator
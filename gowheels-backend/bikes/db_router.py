@@ -0,0 +1,87 @@
+# bikes/db_router.py
+"""
+Read replicas.
+
+DATABASE_REPLICAS names the database aliases that replicate 'default'. The
+viewsets with ReplicaReadsMixin run GET/HEAD/OPTIONS requests against one of
+them, picked per request; other requests and every write use the primary.
+
+Replicas lag behind, so a user's successful write makes that user's reads
+stick to the primary for REPLICA_STICKY_SECONDS. The mark is kept in the
+cache so it holds across workers. Without replicas everything uses
+'default', as before.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+
+STICKY_KEY = 'db:sticky:user:{}'
+PRIMARY = 'default'
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def get_cache():
+    return caches[getattr(settings, 'REPLICA_CACHE_ALIAS', 'default')]
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+@contextmanager
+def reading_from(alias):
+    """Route the reads of the block to alias (None: no preference)"""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def stick_to_primary(user):
+    """Read user's data from the primary until their latest write has replicated"""
+    if user.is_authenticated and replicas():
+        get_cache().set(STICKY_KEY.format(user.pk), True, getattr(settings, 'REPLICA_STICKY_SECONDS', 15))
+
+
+def is_sticky(user):
+    return user.is_authenticated and get_cache().get(STICKY_KEY.format(user.pk)) is not None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Also for instances that were read from a replica
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaReadsMixin:
+    """Read-only requests read from a replica unless the user wrote recently; writes make the user sticky"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        available = replicas()
+        if available and request.method in SAFE_METHODS and not is_sticky(request.user):
+            self._replica_token = _read_alias.set(random.choice(available))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._replica_token = None
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            stick_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
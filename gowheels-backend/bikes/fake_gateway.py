@@ -0,0 +1,83 @@
+# bikes/fake_gateway.py
+"""
+A local stand-in for the SMS gateway, for load and failure testing offline.
+
+It accepts the batch requests sms.Gateway sends, waits `latency` seconds,
+fails a `fail_rate` share of them with 503 (or 429 with Retry-After when
+`throttle` is set), and records every accepted recipient.
+"""
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        time.sleep(server.latency)
+
+        with server.lock:
+            server.requests += 1
+            fail = server.random.random() < server.fail_rate
+        if fail:
+            status = 429 if server.throttle else 503
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', '0')
+            self.end_headers()
+            return
+
+        recipients = payload.get('recipients', [])
+        with server.lock:
+            server.delivered += [(r['mobiles'], r['otp']) for r in recipients]
+        if server.echo:
+            for recipient in recipients:
+                print(f"📱 OTP for {recipient['mobiles']}: {recipient['otp']}")
+        body = json.dumps({'type': 'success', 'count': len(recipients)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeGateway(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, fail_rate=0.0, throttle=False, echo=False, seed=None):
+        super().__init__((host, port), FakeGatewayHandler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.throttle = throttle
+        self.echo = echo
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.delivered = []
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/api/v5/flow/'
+
+    def handle_error(self, request, client_address):
+        # A client that timed out and hung up is expected in failure tests
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def start(self):
+        """Serve from a background thread; returns self"""
+        threading.Thread(target=self.serve_forever, name='fake-sms-gateway', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
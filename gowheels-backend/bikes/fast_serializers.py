@@ -0,0 +1,161 @@
+# bikes/fast_serializers.py
+"""
+Read-only fast paths for BikeSerializer / BookingSerializer.
+
+They work on .values() rows instead of model instances and skip DRF's
+per-field machinery, while reusing DRF's own field formatting so the
+rendered JSON is byte-for-byte what the ModelSerializers produce.
+"""
+from functools import cached_property
+
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+
+from .fieldsets import FULL
+from .image_pipeline import current_variants
+from .models import Bike
+
+# Output order of UserSerializer, BikeSerializer and BookingSerializer
+USER_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name')
+BIKE_FIELDS = (
+    'id', 'owner', 'title', 'description', 'bike_type', 'price_per_day', 'location', 'latitude',
+    'longitude', 'image', 'image_variants', 'available', 'number_plate', 'number_plate_image', 'is_verified',
+    'verification_status', 'created_at', 'updated_at',
+)
+BOOKING_FIELDS = ('id', 'bike', 'renter', 'start_date', 'end_date', 'total_price', 'status', 'created_at')
+
+
+class MediaURLs:
+    """Absolute media URLs with the host/prefix resolved once per request"""
+
+    def __init__(self, request, storage):
+        self.request = request
+        self.storage = storage
+        self.prefix = None
+        if request is not None and isinstance(storage, FileSystemStorage) and storage.base_url.startswith('/'):
+            self.prefix = request.build_absolute_uri(storage.base_url)
+
+    def url(self, name):
+        if not name:
+            return None
+        if self.prefix is not None:
+            return self.prefix + filepath_to_uri(name).lstrip('/')
+        url = self.storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request else url
+
+
+class UserRows:
+    """Nested UserSerializer output (or just the id when not expanded)"""
+
+    def __init__(self, shape, prefix):
+        self.prefix = prefix
+        self.fields = [f for f in USER_FIELDS if shape.includes(f)]
+
+    def value_fields(self):
+        return [f'{self.prefix}__{f}' for f in self.fields]
+
+    def build(self, row):
+        return {f: row[f'{self.prefix}__{f}'] for f in self.fields}
+
+
+class BikeRows:
+    """
+    Stand-in for BikeSerializer(many=True).data over Bike querysets.
+
+    Only the columns the shape asks for are selected, and the owner is
+    joined only when it is embedded.
+    """
+    fields = BIKE_FIELDS
+
+    def __init__(self, request, shape=FULL, prefix=''):
+        self.prefix = prefix
+        self.shape = shape
+        self.fields = [f for f in self.fields if shape.includes(f)]
+        self.image_urls = MediaURLs(request, Bike._meta.get_field('image').storage)
+        self.plate_urls = MediaURLs(request, Bike._meta.get_field('number_plate_image').storage)
+        self.price = serializers.DecimalField(max_digits=8, decimal_places=2)
+        # Resolved once here; the plain field looks the timezone up for every value
+        self.datetime = serializers.DateTimeField(default_timezone=timezone.get_current_timezone())
+        self.relations = {}
+        if 'owner' in self.fields and shape.expands('owner'):
+            self.relations['owner'] = UserRows(shape.child('owner'), prefix + 'owner')
+
+    def value_fields(self):
+        columns = []
+        for name in self.fields:
+            if name in self.relations:
+                columns += self.relations[name].value_fields()
+            elif name == 'image_variants':
+                columns += [self.prefix + 'processed_images', self.prefix + 'image']
+            else:
+                columns.append(self.prefix + name)
+        return columns
+
+    def values(self, queryset):
+        # id and created_at are always fetched for cursor pagination
+        columns = dict.fromkeys(self.value_fields() + ['id', 'created_at'])
+        return queryset.values(*columns)
+
+    def formatters(self):
+        return {
+            'price_per_day': self.price.to_representation,
+            'image': self.image_urls.url,
+            'number_plate_image': self.plate_urls.url,
+            'created_at': self.datetime.to_representation,
+            'updated_at': self.datetime.to_representation,
+        }
+
+    @cached_property
+    def plan(self):
+        formatters = self.formatters()
+        return [(name, self.prefix + name, formatters.get(name)) for name in self.fields]
+
+    def image_variants(self, row):
+        variants = current_variants(row[self.prefix + 'processed_images'], 'image', row[self.prefix + 'image'])
+        if variants is None:
+            return None
+        return {
+            variant: {fmt: self.image_urls.url(name) for fmt, name in formats.items()}
+            for variant, formats in variants.items()
+        }
+
+    def build(self, row):
+        data = {}
+        for name, column, formatter in self.plan:
+            if name == 'image_variants':
+                data[name] = self.image_variants(row)
+            elif name in self.relations:
+                data[name] = self.relations[name].build(row)
+            elif formatter is None:
+                data[name] = row[column]
+            else:
+                data[name] = formatter(row[column])
+        return data
+
+    def serialize(self, rows):
+        return [self.build(row) for row in rows]
+
+
+class BookingRows(BikeRows):
+    """Stand-in for BookingSerializer(many=True).data over Booking querysets"""
+    fields = BOOKING_FIELDS
+
+    def __init__(self, request, shape=FULL):
+        super().__init__(request, shape)
+        self.total = serializers.DecimalField(max_digits=10, decimal_places=2)
+        self.date = serializers.DateField()
+        self.relations = {}
+        if 'bike' in self.fields and shape.expands('bike'):
+            self.relations['bike'] = BikeRows(request, shape.child('bike'), prefix='bike__')
+        if 'renter' in self.fields and shape.expands('renter'):
+            self.relations['renter'] = UserRows(shape.child('renter'), 'renter')
+
+    def formatters(self):
+        return {
+            'start_date': self.date.to_representation,
+            'end_date': self.date.to_representation,
+            'total_price': self.total.to_representation,
+            'created_at': self.datetime.to_representation,
+        }
@@ -0,0 +1,80 @@
+# bikes/fieldsets.py
+"""
+?fields= and ?expand= handling shared by the serializers and the fast read path.
+
+    ?fields=id,start_date,bike.title     only these fields (dotted = nested)
+    ?expand=bike,bike.owner              embed these relations, others become ids
+
+Without ?expand every relation is embedded, as before; without ?fields
+every field is returned.
+"""
+
+
+class Shape:
+    """Which fields of one resource to render and which relations to embed"""
+
+    def __init__(self, fields=None, expand=None, children=None):
+        self.fields = fields  # set of names, or None for all
+        self.expand = expand  # set of relation names, or None to embed all
+        self.children = children or {}  # relation name -> Shape
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None:
+            return FULL
+        params = request.query_params
+        fields = [f for f in params.get('fields', '').split(',') if f.strip()]
+        expand = [e for e in params.get('expand', '').split(',') if e.strip()]
+        if not fields and 'expand' not in params:
+            return FULL
+        return cls.parse(fields or None, expand if 'expand' in params else None)
+
+    @classmethod
+    def parse(cls, fields, expand):
+        own_fields, child_fields = cls._split(fields)
+        own_expand, child_expand = cls._split(expand)
+        children = {
+            name: cls.parse(child_fields.get(name), None if expand is None else child_expand.get(name, []))
+            for name in set(child_fields) | set(child_expand) | (own_expand or set())
+        }
+        return cls(own_fields, own_expand, children)
+
+    @staticmethod
+    def _split(paths):
+        """['a', 'b.c', 'b.d'] -> ({'a', 'b'}, {'b': ['c', 'd']})"""
+        if paths is None:
+            return None, {}
+        own, nested = set(), {}
+        for path in paths:
+            head, _, rest = path.strip().partition('.')
+            own.add(head)
+            if rest:
+                nested.setdefault(head, []).append(rest)
+        return own, nested
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        return self.expand is None or name in self.expand
+
+    def child(self, name):
+        if name in self.children:
+            return self.children[name]
+        return FULL if self.expand is None else Shape(expand=set())
+
+    def select_related(self, relations, prefix=''):
+        """select_related() paths for the embedded relations among `relations`"""
+        paths = []
+        for name, nested in relations.items():
+            if self.includes(name) and self.expands(name):
+                paths.append(prefix + name)
+                paths += self.child(name).select_related(nested, f'{prefix}{name}__')
+        return paths
+
+
+FULL = Shape()
+
+# Embeddable relations of each resource, nested the way the serializers nest them
+BIKE_RELATIONS = {'owner': {}}
+BOOKING_RELATIONS = {'bike': BIKE_RELATIONS, 'renter': {}}
@@ -0,0 +1,128 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .availability import busy_bikes, tracked
+from .models import Booking
+from .search import search_bikes
+
+TRUE_VALUES = {'true', '1', 'yes'}
+FALSE_VALUES = {'false', '0', 'no'}
+
+
+def parse_bool(params, name):
+    value = params[name].lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError({name: 'Must be true or false.'})
+
+
+def parse_price(params, name):
+    try:
+        value = Decimal(params[name])
+    except InvalidOperation:
+        raise ValidationError({name: 'A valid number is required.'})
+    if not value.is_finite() or value < 0:
+        raise ValidationError({name: 'A valid number is required.'})
+    return value
+
+
+def parse_day(params, name):
+    """Read an optional ?name=YYYY-MM-DD; None if absent"""
+    if not params.get(name):
+        return None
+    try:
+        value = parse_date(params[name])
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({name: 'Dates must be in YYYY-MM-DD format.'})
+    return value
+
+
+def parse_date_range(params):
+    """Read ?start_date=&end_date= (ISO dates, end exclusive); None if absent"""
+    start, end = params.get('start_date'), params.get('end_date')
+    if not start and not end:
+        return None
+    if not (start and end):
+        raise ValidationError({'end_date' if start else 'start_date': 'start_date and end_date must be given together.'})
+    try:
+        start_date, end_date = parse_date(start), parse_date(end)
+    except ValueError:
+        start_date = end_date = None
+    if start_date is None or end_date is None:
+        raise ValidationError({'start_date': 'Dates must be in YYYY-MM-DD format.'})
+    if end_date <= start_date:
+        raise ValidationError({'end_date': 'end_date must be after start_date.'})
+    return start_date, end_date
+
+
+def free_between(queryset, start_date, end_date, busy=None):
+    """
+    Bikes with no pending/confirmed booking overlapping the range, read off
+    the occupancy bitmaps (an anti-join on bookings before their epoch).
+    busy, if given, is busy_bikes() for the range, already read.
+    """
+    if tracked(start_date):
+        return queryset.exclude(pk__in=busy_bikes(start_date, end_date) if busy is None else busy)
+    clashes = Booking.objects.active().overlapping(start_date, end_date).filter(bike=OuterRef('pk'))
+    return queryset.filter(~Exists(clashes))
+
+
+def _busy_bikes_once(request, start_date, end_date):
+    """busy_bikes() for the range, read once per request (validators and page filter it alike)"""
+    if not hasattr(request, '_busy_bikes'):
+        request._busy_bikes = busy_bikes(start_date, end_date)
+    return request._busy_bikes
+
+
+def deciding_bookings(request, *args, **kwargs):
+    """
+    The bookings whose changes can move bikes in or out of the
+    ?start_date=&end_date= results (cancelled ones included), or None
+    """
+    dates = parse_date_range(request.query_params)
+    return Booking.objects.overlapping(*dates) if dates else None
+
+
+class BikeFilterBackend(BaseFilterBackend):
+    """
+    Server-side catalogue filters:
+    ?bike_type=&location=&min_price=&max_price=&available=&verification_status=&q=
+    ?start_date=&end_date= keeps only bikes free for the whole range
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        if params.get('bike_type'):
+            queryset = queryset.filter(bike_type=params['bike_type'])
+        if params.get('verification_status'):
+            queryset = queryset.filter(verification_status=params['verification_status'])
+        if params.get('available'):
+            queryset = queryset.filter(available=parse_bool(params, 'available'))
+        if params.get('location'):
+            # Case-insensitive exact match, served by the Lower(location) index
+            queryset = queryset.alias(location_lower=Lower('location')).filter(
+                location_lower=params['location'].strip().lower()
+            )
+        if params.get('min_price'):
+            queryset = queryset.filter(price_per_day__gte=parse_price(params, 'min_price'))
+        if params.get('max_price'):
+            queryset = queryset.filter(price_per_day__lte=parse_price(params, 'max_price'))
+        if params.get('q'):
+            queryset = search_bikes(queryset, params['q'])
+
+        date_range = parse_date_range(params)
+        if date_range:
+            busy = _busy_bikes_once(request, *date_range) if tracked(date_range[0]) else None
+            queryset = free_between(queryset, *date_range, busy=busy)
+
+        return queryset
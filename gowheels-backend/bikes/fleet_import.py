@@ -0,0 +1,190 @@
+# bikes/fleet_import.py
+"""
+Bulk fleet import.
+
+A CSV or JSON file of bikes (the BikeImportSerializer fields) is validated
+in batches of BIKE_IMPORT_BATCH_SIZE rows. Number plates are checked with one
+query per batch, plus against the rows before them in the file, and the
+valid rows go in with a single bulk_create. The image and number_plate_image
+columns name files in an optional zip, which are stored like any upload.
+
+Rows that fail are reported by row number, with the same error format as
+POST /api/bikes/; every other row is imported. A file that cannot be read
+is rejected whole, before the first batch goes in, and a number plate taken
+by another request in the meantime becomes an error of its row.
+"""
+import csv
+import io
+import json
+import os
+import zipfile
+from itertools import islice
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError
+from PIL import Image
+
+from . import geo
+from .models import Bike
+from .serializers import BikeImportSerializer
+
+IMAGE_FIELDS = ('image', 'number_plate_image')
+PLATE_TAKEN = 'bike with this number plate already exists.'
+
+
+class FleetFileError(ValueError):
+    """The file as a whole cannot be read"""
+
+
+def batch_size():
+    return getattr(settings, 'BIKE_IMPORT_BATCH_SIZE', 500)
+
+
+def read_rows(file, name=''):
+    """Rows of a .csv or .json file (a list of objects, or {"bikes": [...]}) as dicts"""
+    if name.lower().endswith('.json'):
+        try:
+            data = json.load(file)
+        except ValueError as e:
+            raise FleetFileError(f'Invalid JSON: {e}')
+        rows = data.get('bikes') if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise FleetFileError('Expected a list of bikes.')
+        return iter(rows)
+    if name.lower().endswith('.csv'):
+        # Rows are decoded lazily, so parse the whole file once up front:
+        # a bad byte near the end must not fail it after batches went in
+        for _ in _csv_rows(file):
+            pass
+        file.seek(0)
+        return _csv_rows(file)
+    raise FleetFileError('Upload a .csv or .json file.')
+
+
+def _csv_rows(file):
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        for row in csv.DictReader(text):
+            # Empty cells mean "not given", so model defaults apply
+            yield {key.strip(): value for key, value in row.items() if key and value not in ('', None)}
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise FleetFileError(f'Invalid CSV: {e}')
+    finally:
+        # Leave file open for the next pass
+        text.detach()
+
+
+class ImageArchive:
+    """The images zip; files are verified and stored as rows ask for them"""
+
+    def __init__(self, file):
+        try:
+            self.zip = zipfile.ZipFile(file)
+        except zipfile.BadZipFile:
+            raise FleetFileError('The images file is not a valid zip.')
+        self.members = {info.filename: info for info in self.zip.infolist() if not info.is_dir()}
+        self.max_bytes = getattr(settings, 'BIKE_IMPORT_MAX_IMAGE_BYTES', 10 * 1024 * 1024)
+
+    def store(self, field, name):
+        """Stored name for zip member name in field; raises ValueError"""
+        info = self.members.get(name)
+        if info is None:
+            raise ValueError(f'{name} is not in the images zip.')
+        if info.file_size > self.max_bytes:
+            raise ValueError(f'{name} is larger than {self.max_bytes} bytes.')
+        with self.zip.open(info) as member:
+            content = io.BytesIO(member.read())
+        try:
+            with Image.open(content) as picture:
+                picture.verify()
+        except Exception:
+            raise ValueError(f'{name} is not a valid image.')
+        content.seek(0)
+        model_field = Bike._meta.get_field(field)
+        filename = model_field.generate_filename(None, os.path.basename(name))
+        return model_field.storage.save(filename, File(content, name=filename))
+
+
+def _batches(rows, size):
+    numbered = enumerate(rows, 1)
+    while batch := list(islice(numbered, size)):
+        yield batch
+
+
+def taken_plates(plates):
+    return set(Bike.objects.filter(number_plate__in=plates).values_list('number_plate', flat=True))
+
+
+def _create(numbered_bikes, report):
+    """
+    Insert [(row number, bike)] in one go; if a number plate was taken since
+    it was checked, insert the rows one by one and report the ones that clash.
+    """
+    try:
+        return Bike.objects.create_in_bulk([bike for _, bike in numbered_bikes])
+    except IntegrityError:
+        pass
+    created = []
+    for number, bike in numbered_bikes:
+        try:
+            created += Bike.objects.create_in_bulk([bike])
+        except IntegrityError:
+            # Its images stay unreferenced blobs, which collect_media removes
+            report['errors'].append({'row': number, 'errors': {'number_plate': [PLATE_TAKEN]}})
+    return created
+
+
+def import_bikes(owner, rows, images=None, size=None):
+    """
+    Create owner's bikes from rows of field dicts.
+
+    Returns {'created': n, 'ids': [...], 'errors': [{'row': n, 'errors': {...}}]}
+    """
+    report = {'created': 0, 'ids': [], 'errors': []}
+    seen_plates = set()
+    for batch in _batches(rows, size or batch_size()):
+        valid = []
+        for number, row in batch:
+            serializer = BikeImportSerializer(data=row) if isinstance(row, dict) else None
+            if serializer is not None and serializer.is_valid():
+                valid.append((number, dict(serializer.validated_data)))
+            else:
+                errors = serializer.errors if serializer is not None else {'non_field_errors': ['Expected an object.']}
+                report['errors'].append({'row': number, 'errors': errors})
+
+        plates = {data['number_plate'] for _, data in valid if data.get('number_plate')}
+        taken = taken_plates(plates)
+
+        bikes = []
+        for number, data in valid:
+            errors = {}
+            plate = data.get('number_plate') or None
+            data['number_plate'] = plate
+            if plate in taken or plate in seen_plates:
+                errors['number_plate'] = [PLATE_TAKEN]
+            for field in IMAGE_FIELDS:
+                name = data.pop(field, '')
+                if not name or errors:
+                    continue
+                if images is None:
+                    errors[field] = [f'{name} was named but no images zip was uploaded.']
+                    continue
+                try:
+                    data[field] = images.store(field, name)
+                except ValueError as e:
+                    errors[field] = [str(e)]
+            if errors:
+                report['errors'].append({'row': number, 'errors': errors})
+                continue
+            if plate:
+                seen_plates.add(plate)
+            bike = Bike(owner=owner, **data)
+            geo.locate(bike)  # bulk_create skips the pre_save receiver
+            bikes.append((number, bike))
+
+        created = _create(bikes, report)
+        report['created'] += len(created)
+        report['ids'] += [bike.pk for bike in created]
+    report['errors'].sort(key=lambda error: error['row'])
+    return report
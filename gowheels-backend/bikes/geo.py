@@ -0,0 +1,167 @@
+# bikes/geo.py
+"""
+Bike coordinates and "near me" search.
+
+Bikes get latitude/longitude from their free-text location through GEOCODER,
+the dotted path of a class whose instances map a location string to
+(lat, lng) or None. The default looks names up in an offline gazetteer of
+cities, extendable with a CSV file (GEOCODER_GAZETTEER); explicit
+coordinates sent with a bike are kept as they are.
+
+Each located bike also stores geo_cell, the CELL_DEGREES grid square it
+lies in, numbered row by row so that the cells of one grid row form a
+contiguous range. A radius search asks the geo_cell index for one range
+per grid row of the bounding box, then ranks the candidates by exact
+haversine distance with NumPy. Plain B-tree indexes, so it runs on SQLite
+without any spatial extension.
+"""
+import csv
+import math
+import re
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+CELL_DEGREES = 0.1
+ROWS = int(180 / CELL_DEGREES)
+COLUMNS = int(360 / CELL_DEGREES)
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+# Name -> (latitude, longitude); lookups are case-insensitive
+GAZETTEER = {
+    'dehradun': (30.3165, 78.0322),
+    'mussoorie': (30.4598, 78.0644),
+    'rishikesh': (30.0869, 78.2676),
+    'haridwar': (29.9457, 78.1642),
+    'nainital': (29.3919, 79.4542),
+    'delhi': (28.6139, 77.2090),
+    'new delhi': (28.6139, 77.2090),
+    'noida': (28.5355, 77.3910),
+    'gurugram': (28.4595, 77.0266),
+    'gurgaon': (28.4595, 77.0266),
+    'chandigarh': (30.7333, 76.7794),
+    'shimla': (31.1048, 77.1734),
+    'manali': (32.2432, 77.1892),
+    'leh': (34.1526, 77.5771),
+    'jaipur': (26.9124, 75.7873),
+    'udaipur': (24.5854, 73.7125),
+    'lucknow': (26.8467, 80.9462),
+    'ahmedabad': (23.0225, 72.5714),
+    'mumbai': (19.0760, 72.8777),
+    'pune': (18.5204, 73.8567),
+    'goa': (15.2993, 74.1240),
+    'panaji': (15.4909, 73.8278),
+    'bengaluru': (12.9716, 77.5946),
+    'bangalore': (12.9716, 77.5946),
+    'chennai': (13.0827, 80.2707),
+    'hyderabad': (17.3850, 78.4867),
+    'kolkata': (22.5726, 88.3639),
+}
+
+COORDINATES_RE = re.compile(r'^\s*(-?\d{1,2}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)\s*$')
+
+
+class GazetteerGeocoder:
+    """
+    Offline geocoder: a location such as "Rajpur Road, Dehradun" resolves to
+    the first of its comma-separated parts (or words) found in the gazetteer.
+    A location written as "lat, lng" is taken literally.
+    """
+
+    def __init__(self):
+        self.places = dict(GAZETTEER)
+        path = getattr(settings, 'GEOCODER_GAZETTEER', None)
+        if path:
+            with open(path, newline='', encoding='utf-8') as f:
+                for name, lat, lng in csv.reader(f):
+                    self.places[name.strip().lower()] = (float(lat), float(lng))
+
+    def __call__(self, location):
+        match = COORDINATES_RE.match(location or '')
+        if match:
+            lat, lng = float(match.group(1)), float(match.group(2))
+            return (lat, lng) if abs(lat) <= 90 and abs(lng) <= 180 else None
+        text = ' '.join((location or '').lower().split())
+        parts = [part.strip() for part in text.split(',')]
+        for candidate in [text, *parts, *' '.join(parts).split()]:
+            if candidate in self.places:
+                return self.places[candidate]
+        return None
+
+
+@lru_cache(maxsize=None)
+def _geocoder(path):
+    return import_string(path)()
+
+
+def geocode(location):
+    """(lat, lng) for a location string, or None"""
+    return _geocoder(getattr(settings, 'GEOCODER', 'bikes.geo.GazetteerGeocoder'))(location)
+
+
+def _row(lat):
+    return min(max(int((lat + 90) // CELL_DEGREES), 0), ROWS - 1)
+
+
+def _column(lng):
+    return min(max(int((lng + 180) // CELL_DEGREES), 0), COLUMNS - 1)
+
+
+def cell(lat, lng):
+    """geo_cell of a point; None without coordinates"""
+    if lat is None or lng is None:
+        return None
+    return _row(lat) * COLUMNS + _column(lng)
+
+
+def locate(bike, previous=None):
+    """
+    Fill in bike's coordinates and geo_cell before it is saved.
+
+    previous is the stored (location, latitude, longitude), None for a new
+    bike. Coordinates that were set explicitly are kept; otherwise the
+    location is geocoded when it is new or has changed.
+    """
+    point = (bike.latitude, bike.longitude)
+    explicit = None not in point and (previous is None or point != tuple(previous[1:]))
+    if not explicit and (previous is None or bike.location != previous[0] or None in point):
+        bike.latitude, bike.longitude = geocode(bike.location) or (None, None)
+    bike.geo_cell = cell(bike.latitude, bike.longitude)
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """Great-circle distances from (lat, lng) to arrays of points"""
+    lat, lng = math.radians(lat), math.radians(lng)
+    lats, lngs = np.radians(lats), np.radians(lngs)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def bounding_box(lat, lng, radius_km):
+    """Q for the bikes in the grid cells and lat/lng box around a circle"""
+    lat_delta = radius_km / KM_PER_DEGREE
+    lng_delta = min(radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6)), 180)
+    first_column, last_column = _column(lng - lng_delta), _column(lng + lng_delta)
+    cells = Q()
+    for row in range(_row(lat - lat_delta), _row(lat + lat_delta) + 1):
+        cells |= Q(geo_cell__range=(row * COLUMNS + first_column, row * COLUMNS + last_column))
+    return cells & Q(latitude__range=(lat - lat_delta, lat + lat_delta),
+                     longitude__range=(lng - lng_delta, lng + lng_delta))
+
+
+def nearby(queryset, lat, lng, radius_km, limit):
+    """[(bike id, distance in km)] of the nearest limit bikes within radius_km, nearest first"""
+    rows = list(queryset.filter(bounding_box(lat, lng, radius_km)).values_list('id', 'latitude', 'longitude'))
+    if not rows:
+        return []
+    ids, lats, lngs = (np.array(column) for column in zip(*rows))
+    distances = haversine_km(lat, lng, lats, lngs)
+    inside = np.flatnonzero(distances <= radius_km)
+    if len(inside) > limit:
+        inside = inside[np.argpartition(distances[inside], limit - 1)[:limit]]
+    inside = inside[np.argsort(distances[inside], kind='stable')]
+    return [(int(ids[i]), float(distances[i])) for i in inside]
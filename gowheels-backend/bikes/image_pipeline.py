@@ -0,0 +1,214 @@
+# bikes/image_pipeline.py
+"""
+Post-upload image processing.
+
+Uploads are stored as-is by the request, then a worker thread caps the
+original's dimensions, renders list/detail thumbnails as WebP and JPEG, and
+records the results in the model's ``processed_images`` JSON:
+
+    {"image": {"source": "bikes/x.jpg",
+               "variants": {"list": {"webp": "bikes/variants/x.list.webp", ...}, ...}}}
+
+``source`` is the stored name the entry belongs to; a field whose current
+name differs from it has not been processed yet.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .signals import bikes_bulk_updated
+from .storage import references_of, update_references
+
+logger = logging.getLogger(__name__)
+
+# Fields to process per model, and the thumbnails (bounding boxes) each gets
+PIPELINES = {
+    'bikes.Bike': {
+        'image': {'list': (480, 360), 'detail': (1280, 960)},
+        'number_plate_image': {},
+    },
+    'bikes.UserProfile': {
+        'aadhaar_card': {},
+    },
+}
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+ORIGINAL_FORMATS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+def max_dimension():
+    return getattr(settings, 'IMAGE_MAX_DIMENSION', 2048)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_WORKERS', 2),
+                thread_name_prefix='image-pipeline',
+            )
+        return _executor
+
+
+def unprocessed_fields(instance):
+    """{field: stored name} for configured image fields that still need processing"""
+    fields = PIPELINES.get(instance._meta.label, {})
+    processed = instance.processed_images or {}
+    pending = {}
+    for field in fields:
+        name = getattr(instance, field).name
+        if name and processed.get(field, {}).get('source') != name:
+            pending[field] = name
+    return pending
+
+
+def current_variants(processed_images, field, name):
+    """{variant: {format: stored name}} for field, or None if its current file has none (yet)"""
+    entry = (processed_images or {}).get(field)
+    if not name or not entry or entry.get('source') != name:
+        return None
+    return entry['variants'] or None
+
+
+def schedule(instance):
+    """Queue processing of instance's new uploads once the current transaction commits"""
+    pending = unprocessed_fields(instance)
+    if not pending:
+        return
+    label, pk = instance._meta.label, instance.pk
+
+    def submit():
+        if getattr(settings, 'IMAGE_PROCESSING_ASYNC', True):
+            future = get_executor().submit(_run_job, label, pk, pending)
+            _pending.add(future)
+            future.add_done_callback(_pending.discard)
+        else:
+            process(label, pk, pending)
+
+    transaction.on_commit(submit)
+
+
+def wait(timeout=None):
+    """Block until queued jobs are done (tests, management commands)"""
+    for future in list(_pending):
+        future.result(timeout)
+
+
+def _run_job(label, pk, pending):
+    try:
+        process(label, pk, pending)
+    except Exception:
+        logger.exception('Image processing failed for %s %s', label, pk)
+    finally:
+        # Worker threads own their DB connections
+        close_old_connections()
+
+
+def _encode(image, fmt):
+    pil_format, options = FORMATS[fmt] if fmt in FORMATS else (fmt, {})
+    if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def _render(storage, name, thumbnails):
+    """Cap the stored image and render its thumbnails; returns (new name or None, variants)"""
+    with storage.open(name, 'rb') as f:
+        image = Image.open(f)
+        original_format = image.format
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    stem, _ = os.path.splitext(name)
+    directory, base = os.path.split(stem)
+
+    capped_name = None
+    limit = max_dimension()
+    if max(image.size) > limit:
+        image.thumbnail((limit, limit), Image.Resampling.LANCZOS)
+        pil_format = original_format if original_format in ORIGINAL_FORMATS else 'JPEG'
+        capped_name = storage.save(stem + ORIGINAL_FORMATS[pil_format], _encode(image, pil_format))
+
+    variants = {}
+    for variant, box in thumbnails.items():
+        thumb = image.copy()
+        thumb.thumbnail(box, Image.Resampling.LANCZOS)
+        variants[variant] = {
+            fmt: storage.save(os.path.join(directory, 'variants', f'{base}.{variant}.{fmt}'), _encode(thumb, fmt))
+            for fmt in FORMATS
+        }
+    return capped_name, variants
+
+
+def _variant_names(entry):
+    return [name for formats in entry.get('variants', {}).values() for name in formats.values()]
+
+
+def process(label, pk, pending):
+    """Process the given {field: stored name} uploads of one row"""
+    model = apps.get_model(label)
+    fields = PIPELINES[label]
+    storage_of = {field: model._meta.get_field(field).storage for field in pending}
+
+    results = {}
+    for field, name in pending.items():
+        try:
+            results[field] = _render(storage_of[field], name, fields[field])
+        except (UnidentifiedImageError, OSError) as e:
+            # Recorded as processed without variants so it is not retried on every save
+            logger.warning('Could not process %s.%s for %s: %s', label, field, pk, e)
+            results[field] = (None, {})
+
+    garbage = []  # (storage, name) pairs to delete once the row points elsewhere
+    with transaction.atomic():
+        row = model.objects.select_for_update().filter(pk=pk).first()
+        processed = dict(row.processed_images or {}) if row else {}
+        changes = {}
+        for field, (capped_name, variants) in results.items():
+            storage, source = storage_of[field], pending[field]
+            new_files = ([capped_name] if capped_name else []) + _variant_names({'variants': variants})
+            if row is None or getattr(row, field).name != source:
+                # Deleted or re-uploaded meanwhile; this work is stale
+                garbage += [(storage, name) for name in new_files]
+                continue
+            garbage += [(storage, name) for name in _variant_names(processed.get(field, {}))]
+            if capped_name:
+                changes[field] = capped_name
+                garbage.append((storage, source))
+            processed[field] = {'source': capped_name or source, 'variants': variants}
+        if row is not None and results:
+            before = references_of(row)
+            if any(f.name == 'updated_at' for f in model._meta.concrete_fields):
+                changes['updated_at'] = timezone.now()
+            model.objects.filter(pk=pk).update(processed_images=processed, **changes)
+            # update() skips the receivers that keep blob reference counts
+            row.processed_images = processed
+            for field, value in changes.items():
+                setattr(row, field, value)
+            update_references(before, references_of(row))
+
+    for storage, name in garbage:
+        storage.delete(name)
+
+    if label == 'bikes.Bike' and results:
+        # update() skips post_save; let caches know the image URLs moved
+        bikes_bulk_updated.send(sender=model, bike_ids=[pk])
@@ -0,0 +1,144 @@
+import asyncio
+import io
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bikes.models import Bike, Booking
+
+# name -> (WSGI path, ASGI path); {bike} is a bike id
+TARGETS = {
+    'bikes': ('/api/bikes/', '/api/async/bikes/'),
+    'bike': ('/api/bikes/{bike}/', '/api/async/bikes/{bike}/'),
+    'my_bookings': ('/api/bookings/my_bookings/', '/api/async/bookings/my_bookings/'),
+    'my_rentals': ('/api/bookings/my_rentals/', '/api/async/bookings/my_rentals/'),
+}
+
+
+def percentile(timings, share):
+    return timings[min(len(timings) - 1, int(len(timings) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load the WSGI and ASGI applications in-process with the same authenticated reads at high '
+        'concurrency and report requests/sec and latency (benchmark rows are deleted afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Per endpoint and server')
+        parser.add_argument('--concurrency', type=int, default=64,
+                            help='WSGI threads / ASGI in-flight requests')
+        parser.add_argument('--bikes', type=int, default=200)
+        parser.add_argument('--bookings', type=int, default=50)
+        parser.add_argument('--target', choices=sorted(TARGETS), action='append')
+
+    def handle(self, *args, **options):
+        owner = User.objects.create_user('bench-asgi-owner')
+        renter = User.objects.create_user('bench-asgi-renter')
+        try:
+            bikes = Bike.objects.bulk_create(
+                Bike(owner=owner, title=f'Bench bike {n}', description='Benchmark row', bike_type='road',
+                     price_per_day=Decimal('150.00'), location='Dehradun')
+                for n in range(options['bikes'])
+            )
+            start = date.today() + timedelta(days=30)
+            Booking.objects.bulk_create(
+                Booking(bike=bikes[n % len(bikes)], renter=renter, start_date=start + timedelta(days=3 * n),
+                        end_date=start + timedelta(days=3 * n + 2), total_price=Decimal('300.00'))
+                for n in range(options['bookings'])
+            )
+            tokens = {'bikes': renter, 'bike': renter, 'my_bookings': renter, 'my_rentals': owner}
+            # As deployed: no query logging, which would slow both servers down alike
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=['localhost']):
+                self.run(options, bikes[0].pk, {name: str(AccessToken.for_user(user)) for name, user in tokens.items()})
+        finally:
+            User.objects.filter(pk__in=[owner.pk, renter.pk]).delete()
+
+    def run(self, options, bike_id, tokens):
+        wsgi, asgi = get_wsgi_application(), get_asgi_application()
+        self.stdout.write(f"{'endpoint':<12} {'server':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for name in options['target'] or TARGETS:
+            wsgi_path, asgi_path = (path.format(bike=bike_id) for path in TARGETS[name])
+            for server, load in (('wsgi', lambda: self.load_wsgi(wsgi, wsgi_path, tokens[name], options)),
+                                 ('asgi', lambda: asyncio.run(self.load_asgi(asgi, asgi_path, tokens[name], options)))):
+                started = time.perf_counter()
+                timings, errors = load()
+                elapsed = time.perf_counter() - started
+                timings.sort()
+                self.stdout.write(
+                    f'{name:<12} {server:<6} {len(timings) / elapsed:8.0f} {statistics.median(timings):8.1f} '
+                    f'{percentile(timings, 0.99):8.1f} {errors:7}'
+                )
+
+    def load_wsgi(self, application, path, token, options):
+        def request(_):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_HOST': 'localhost',
+                'HTTP_AUTHORIZATION': f'Bearer {token}', 'REMOTE_ADDR': '127.0.0.1',
+                'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+            }
+            statuses = []
+            started = time.perf_counter()
+            response = application(environ, lambda status, headers: statuses.append(status))
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            return (time.perf_counter() - started) * 1000, statuses[0].startswith('200')
+
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = list(pool.map(request, range(options['requests'])))
+        return [timing for timing, _ in results], sum(not ok for _, ok in results)
+
+    async def load_asgi(self, application, path, token, options):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())],
+            'server': ('localhost', 80), 'client': ('127.0.0.1', 50000),
+        }
+        remaining, timings, errors = options['requests'], [], 0
+
+        async def request():
+            messages = []
+            done = asyncio.Event()
+            body_sent = False
+
+            async def receive():
+                nonlocal body_sent
+                if not body_sent:
+                    body_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                messages.append(message)
+
+            started = time.perf_counter()
+            await application(dict(scope), receive, send)
+            done.set()
+            return (time.perf_counter() - started) * 1000, messages[0]['status'] == 200
+
+        async def client():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                timing, ok = await request()
+                timings.append(timing)
+                errors += not ok
+
+        await asyncio.gather(*(client() for _ in range(options['concurrency'])))
+        return timings, errors
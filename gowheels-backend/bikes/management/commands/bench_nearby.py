@@ -0,0 +1,65 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bikes import geo
+from bikes.models import Bike
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time nearest-bike queries over bikes scattered around the gazetteer cities (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bikes', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--radius', type=float, default=10.0, help='km')
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        rng = random.Random(1)
+        cities = sorted(set(geo.GAZETTEER.values()))
+        owner = User.objects.create_user('bench-owner')
+        started = time.perf_counter()
+        batch = []
+        for n in range(options['bikes']):
+            lat, lng = rng.choice(cities)
+            lat, lng = lat + rng.gauss(0, 0.15), lng + rng.gauss(0, 0.15)
+            batch.append(Bike(owner=owner, title=f'Bench bike {n}', description='Benchmark row', bike_type='road',
+                              price_per_day=Decimal('150.00'), location='bench', latitude=lat, longitude=lng,
+                              geo_cell=geo.cell(lat, lng)))
+            if len(batch) == 5000:
+                Bike.objects.bulk_create(batch)
+                batch = []
+        Bike.objects.bulk_create(batch)
+        self.stdout.write(f"{options['bikes']} bikes inserted in {time.perf_counter() - started:.1f}s")
+
+        timings, found = [], 0
+        for _ in range(options['queries']):
+            lat, lng = rng.choice(cities)
+            lat, lng = lat + rng.gauss(0, 0.05), lng + rng.gauss(0, 0.05)
+            started = time.perf_counter()
+            found += len(geo.nearby(Bike.objects.all(), lat, lng, options['radius'], options['limit']))
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f"{options['queries']} queries, radius {options['radius']} km, k={options['limit']}: "
+            f"median {statistics.median(timings):.1f} ms   p95 {timings[int(len(timings) * 0.95) - 1]:.1f} ms   "
+            f"max {timings[-1]:.1f} ms   {found / len(timings):.1f} bikes/query"
+        )
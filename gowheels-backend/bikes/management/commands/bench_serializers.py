@@ -0,0 +1,78 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from bikes.fast_serializers import BikeRows, BookingRows
+from bikes.models import Bike, Booking
+from bikes.renderers import FastJSONRenderer, orjson
+from bikes.serializers import BikeSerializer, BookingSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare ModelSerializer + JSONRenderer with the fast read path (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def best_of(self, repeat, fn):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings), result
+
+    def run(self, rows, repeat):
+        owner = User.objects.create_user('bench-owner', email='owner@example.com')
+        renter = User.objects.create_user('bench-renter')
+        bikes = Bike.objects.bulk_create([
+            Bike(owner=owner, title=f'Bench bike {i}', description='Benchmark row ' * 5,
+                 bike_type='road', price_per_day=Decimal('150.00'), location='Dehradun',
+                 image=f'bikes/bench_{i}.jpg', number_plate=f'BENCH{i}')
+            for i in range(rows)
+        ], batch_size=500)
+        Booking.objects.bulk_create([
+            Booking(bike=bike, renter=renter, start_date=date(2026, 1, 1) + timedelta(days=i % 300),
+                    end_date=date(2026, 1, 3) + timedelta(days=i % 300), total_price=Decimal('300.00'))
+            for i, bike in enumerate(bikes)
+        ], batch_size=500)
+
+        request = Request(APIRequestFactory().get('/api/bikes/', HTTP_HOST='localhost'))
+        cases = [
+            ('bikes', Bike.objects.select_related('owner').order_by('id'), BikeSerializer, BikeRows),
+            ('bookings', Booking.objects.select_related('bike__owner', 'renter').order_by('id'),
+             BookingSerializer, BookingRows),
+        ]
+        self.stdout.write(f'{rows} rows, best of {repeat}, orjson {"on" if orjson else "off"}')
+        for name, queryset, serializer_class, fast_class in cases:
+            slow, expected = self.best_of(repeat, lambda: JSONRenderer().render(
+                serializer_class(queryset, many=True, context={'request': request}).data
+            ))
+            rows = fast_class(request)
+            fast, actual = self.best_of(repeat, lambda: FastJSONRenderer().render(
+                rows.serialize(rows.values(queryset))
+            ))
+            self.stdout.write(
+                f'{name:9} serializer {slow * 1000:8.1f} ms   fast path {fast * 1000:8.1f} ms   '
+                f'x{slow / fast:.1f}   identical={actual == expected}'
+            )
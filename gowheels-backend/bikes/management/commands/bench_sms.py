@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bikes.fake_gateway import FakeGateway
+from bikes.sms import DeliveryQueue, Gateway
+
+
+class Command(BaseCommand):
+    help = 'Push OTP SMS through the delivery queue into a local fake gateway and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200)
+        parser.add_argument('--latency', type=float, default=0.05, help='Gateway seconds per request')
+        parser.add_argument('--fail-rate', type=float, default=0.0)
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--workers', type=int, default=2)
+
+    def handle(self, *args, **options):
+        fake = FakeGateway(latency=options['latency'], fail_rate=options['fail_rate'], seed=1).start()
+        try:
+            for batch_size in sorted({1, options['batch_size']}):
+                fake.delivered.clear()
+                fake.requests = 0
+                deliveries = DeliveryQueue(Gateway(fake.url, retries=1, backoff=0.01), batch_size=batch_size,
+                                           workers=options['workers'])
+                started = time.perf_counter()
+                for n in range(options['messages']):
+                    deliveries.enqueue(f'{9000000000 + n}', '123456')
+                enqueued = time.perf_counter() - started
+                deliveries.join()
+                elapsed = time.perf_counter() - started
+                stats = deliveries.stats
+                self.stdout.write(
+                    f"batch {batch_size:<4} enqueue {enqueued * 1000:7.1f} ms   "
+                    f"drain {elapsed:6.2f} s   {options['messages'] / elapsed:8.0f} msg/s   "
+                    f"sent {stats['sent']} failed {stats['failed']} in {fake.requests} request(s)"
+                )
+        finally:
+            fake.stop()
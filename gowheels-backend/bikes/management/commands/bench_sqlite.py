@@ -0,0 +1,141 @@
+import io
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bikes.models import Bike, Booking
+
+
+def percentile(timings, share):
+    return timings[min(len(timings) - 1, int(len(timings) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mixed read/write load on the bike and booking endpoints from several worker processes with many '
+        'threads each, against a scratch SQLite database with the stock settings and then in SQLITE_TUNED mode'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4, help='Worker processes, as under gunicorn -w')
+        parser.add_argument('--threads', type=int, default=8, help='Per process')
+        parser.add_argument('--requests', type=int, default=3000, help='Per mode')
+        parser.add_argument('--write-share', type=float, default=0.3, help='Share of requests that book')
+        parser.add_argument('--bikes', type=int, default=50)
+        parser.add_argument('--renters', type=int, default=20)
+
+    def handle(self, *args, **options):
+        database = connections['default'].settings_dict
+        if database['ENGINE'] != 'django.db.backends.sqlite3':
+            self.stderr.write('The default database is not SQLite.')
+            return
+        original = database['NAME'], database['OPTIONS']
+        with tempfile.TemporaryDirectory() as directory:
+            connections.close_all()
+            # Every thread's connection is built from this same dict
+            database['NAME'] = os.path.join(directory, 'bench.sqlite3')
+            try:
+                call_command('migrate', verbosity=0, interactive=False)
+                tokens, bike_ids = self.seed(options)
+                self.stdout.write(f"{'mode':<8} {'req/s':>7} {'reads/s':>8} {'books/s':>8} {'p50 ms':>7} "
+                                  f"{'p99 ms':>8} {'booked':>7} {'409s':>6} {'errors':>7}")
+                for mode, tuned in (('stock', False), ('tuned', True)):
+                    connections.close_all()
+                    database['OPTIONS'] = {'init_command': settings.SQLITE_INIT_COMMAND} if tuned else {}
+                    with override_settings(SQLITE_TUNED=tuned, DEBUG=False, ALLOWED_HOSTS=['localhost']):
+                        self.run(mode, options, tokens, bike_ids)
+                    Booking.objects.all().delete()
+            finally:
+                connections.close_all()
+                database['NAME'], database['OPTIONS'] = original
+
+    def seed(self, options):
+        owner = User.objects.create_user('bench-owner')
+        renters = [User.objects.create_user(f'bench-renter-{n}') for n in range(options['renters'])]
+        bikes = Bike.objects.bulk_create(
+            Bike(owner=owner, title=f'Bench bike {n}', description='Benchmark row', bike_type='road',
+                 price_per_day=Decimal('150.00'), location='Dehradun')
+            for n in range(options['bikes'])
+        )
+        return [str(AccessToken.for_user(renter)) for renter in renters], [bike.pk for bike in bikes]
+
+    def run(self, mode, options, tokens, bike_ids):
+        processes = options['processes']
+        jobs = [(range(n, options['requests'], processes), options['threads'], options['write_share'], tokens, bike_ids)
+                for n in range(processes)]
+        connections.close_all()  # not to be shared with the forked workers
+        with multiprocessing.get_context('fork').Pool(processes) as pool:
+            started = time.perf_counter()
+            results = [result for part in pool.map(load, jobs) for result in part]
+            elapsed = time.perf_counter() - started
+
+        timings = sorted(timing for _, _, timing in results)
+        reads = sum(kind == 'read' and status == 200 for kind, status, _ in results)
+        booked = sum(kind == 'write' and status == 201 for kind, status, _ in results)
+        conflicts = sum(status == 409 for _, status, _ in results)
+        errors = sum(status >= 500 for _, status, _ in results)
+        self.stdout.write(
+            f'{mode:<8} {len(results) / elapsed:7.0f} {reads / elapsed:8.0f} {booked / elapsed:8.0f} '
+            f'{statistics.median(timings):7.1f} {percentile(timings, 0.99):8.1f} {booked:7} {conflicts:6} '
+            f'{errors:7}'
+        )
+
+
+def load(job):
+    """One worker process: [(kind, status, ms)] for its share of the request numbers"""
+    numbers, threads, write_share, tokens, bike_ids = job
+    application = get_wsgi_application()
+    first_day = date.today() + timedelta(days=30)
+
+    def request(n):
+        rng = random.Random(n)
+        token = rng.choice(tokens)
+        if rng.random() < write_share:
+            start = first_day + timedelta(days=rng.randrange(365))
+            body = json.dumps({'bike_id': rng.choice(bike_ids), 'start_date': start.isoformat(),
+                               'end_date': (start + timedelta(days=rng.randint(1, 3))).isoformat()})
+            return ('write', *call(application, 'POST', '/api/bookings/', token, body.encode()))
+        path = '/api/bikes/' if n % 2 else '/api/bookings/my_bookings/'
+        return ('read', *call(application, 'GET', path, token))
+
+    # "database is locked" 500s are counted, not logged one by one
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    with ThreadPoolExecutor(threads) as pool:
+        return list(pool.map(request, numbers))
+
+
+def call(application, method, path, token, body=b''):
+    """(status code, milliseconds) of one request through the WSGI handler"""
+    environ = {
+        'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_HOST': 'localhost',
+        'HTTP_AUTHORIZATION': f'Bearer {token}', 'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)),
+        'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(body), 'wsgi.errors': sys.stderr,
+    }
+    statuses = []
+    started = time.perf_counter()
+    response = application(environ, lambda status, headers: statuses.append(status))
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return int(statuses[0].split()[0]), (time.perf_counter() - started) * 1000
@@ -0,0 +1,32 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from bikes.models import MediaBlob
+from bikes.storage import ContentAddressedStorage, recount
+from bikes.uploads import expire
+
+
+class Command(BaseCommand):
+    help = ('Recount media blob references, delete unreferenced or orphaned blobs '
+            'and expire abandoned chunked uploads')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            raise CommandError('The default storage is not ContentAddressedStorage')
+
+        corrected = recount()
+        self.stdout.write(f'{corrected} reference count(s) corrected')
+
+        if options['dry_run']:
+            unreferenced = MediaBlob.objects.filter(references=0).count()
+            orphans = len(list(default_storage.orphans()))
+            self.stdout.write(f'{unreferenced} unreferenced blob(s), {orphans} orphaned file(s) (dry run)')
+            return
+
+        self.stdout.write(f'{expire()} abandoned chunked upload(s) removed')
+        collected = default_storage.collect()
+        orphans = default_storage.delete_orphans()
+        self.stdout.write(f'{len(collected)} unreferenced blob(s) and {len(orphans)} orphaned file(s) deleted')
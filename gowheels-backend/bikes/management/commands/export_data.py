@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from bikes import export
+
+
+class Command(BaseCommand):
+    help = 'Stream bookings or bikes to a CSV / NDJSON file (or stdout)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(export.EXPORTS))
+        parser.add_argument('--format', dest='fmt', choices=sorted(export.STREAMS), default='csv')
+        parser.add_argument('--from', dest='date_from', help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--to', dest='date_to', help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--status', action='append', default=[], help='Only this status; repeatable')
+        parser.add_argument('--archived', action='store_true', help='Include archived bookings')
+        parser.add_argument('--output', '-o', help='File to write instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            date_from = parse_date(options['date_from'] or '')
+            date_to = parse_date(options['date_to'] or '')
+            querysets = export.EXPORTS[options['kind']].querysets(
+                date_from, date_to, statuses=options['status'], archived=options['archived'],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        chunks = export.stream(options['kind'], options['fmt'], querysets)
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+            for chunk in chunks:
+                out.write(chunk)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from bikes.fake_gateway import FakeGateway
+
+
+class Command(BaseCommand):
+    help = 'Run a local stand-in SMS gateway (point SMS_GATEWAY_URL at the printed URL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8025)
+        parser.add_argument('--latency', type=float, default=0.1, help='Seconds per request')
+        parser.add_argument('--fail-rate', type=float, default=0.0, help='Share of requests that fail')
+        parser.add_argument('--throttle', action='store_true', help='Fail with 429 instead of 503')
+
+    def handle(self, *args, **options):
+        gateway = FakeGateway(port=options['port'], latency=options['latency'],
+                              fail_rate=options['fail_rate'], throttle=options['throttle'], echo=True)
+        self.stdout.write(f'Fake SMS gateway at {gateway.url} (Ctrl+C to stop)')
+        try:
+            gateway.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            gateway.server_close()
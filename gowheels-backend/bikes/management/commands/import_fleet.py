@@ -0,0 +1,39 @@
+import json
+import time
+from contextlib import ExitStack
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from bikes import fleet_import
+
+
+class Command(BaseCommand):
+    help = 'Create bikes in bulk from a CSV or JSON file, with an optional zip of their images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='.csv or .json file of bikes')
+        parser.add_argument('--owner', required=True, help='Username the bikes belong to')
+        parser.add_argument('--images', help='Zip with the files named in the image columns')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows per batch (BIKE_IMPORT_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        owner = User.objects.filter(username=options['owner']).first()
+        if owner is None:
+            raise CommandError(f"No user {options['owner']}")
+
+        started = time.monotonic()
+        with ExitStack() as stack:
+            try:
+                rows = fleet_import.read_rows(stack.enter_context(open(options['file'], 'rb')), options['file'])
+                images = None
+                if options['images']:
+                    images = fleet_import.ImageArchive(stack.enter_context(open(options['images'], 'rb')))
+                report = fleet_import.import_bikes(owner, rows, images, options['batch_size'])
+            except (OSError, fleet_import.FleetFileError) as e:
+                raise CommandError(e)
+
+        for error in report['errors']:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(f"{report['created']} bike(s) imported, {len(report['errors'])} row(s) rejected "
+                          f"in {time.monotonic() - started:.2f}s")
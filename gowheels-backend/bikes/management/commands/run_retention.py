@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bikes.retention import archive_bookings, purge_expired_otps
+
+
+class Command(BaseCommand):
+    help = 'Purge expired OTP rows and archive finished bookings, once or every --every seconds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon-days', type=int, default=None,
+                            help='Archive bookings that ended this many days ago (BOOKING_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows per transaction')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+        parser.add_argument('--every', type=int, default=None, help='Keep running, once per this many seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            purged = purge_expired_otps(options['batch_size'], options['pause'])
+            archived = archive_bookings(options['horizon_days'], options['batch_size'], options['pause'])
+            self.stdout.write(f'{purged} expired OTP(s) purged, {archived} booking(s) archived '
+                              f'in {time.monotonic() - started:.2f}s')
+            if not options['every']:
+                return
+            time.sleep(options['every'])
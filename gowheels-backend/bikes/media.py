@@ -0,0 +1,237 @@
+# bikes/media.py
+"""
+Serving MEDIA_ROOT.
+
+serve_media answers conditional requests and single byte ranges, sends
+strong ETags (the SHA-256 for content-addressed blobs, see storage.py), and
+marks blobs immutable since their bytes can never change under a name.
+
+Identity documents (Aadhaar scans, and anything under documents/) are
+private: only their owner and staff get them, by session or JWT, always
+with Cache-Control: private, no-store so no shared cache keeps a copy.
+Everyone else gets a 404, as for a missing file.
+
+With MEDIA_SENDFILE set, the view only checks the request and names the
+file in an X-Sendfile (Apache, lighttpd) or X-Accel-Redirect (nginx) header;
+the front server then streams it, ranges included, without a Python worker.
+SendfileEmulationMiddleware plays that front server when
+MEDIA_SENDFILE_EMULATE is on (by default under DEBUG), so the offload path
+can be exercised with runserver alone.
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote, unquote
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import UserProfile
+from .storage import BLOB_PREFIX
+
+BLOCK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOB_RE = re.compile(rf'^{BLOB_PREFIX}/[0-9a-f]{{2}}/([0-9a-f]{{64}})(\.\w+)?$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+PRIVATE = 'private, no-store'
+DOCUMENTS_PREFIX = 'documents/'
+
+
+def accel_prefix():
+    return getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+
+def _content_type(full_path):
+    return mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+
+def _resolve(path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        st = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404('No such media file')
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('No such media file')
+    return full_path, st
+
+
+def document_owners(path):
+    """Ids of the users whose identity document is stored at path, or None for public media"""
+    owners = set(UserProfile.objects.filter(aadhaar_card=path).values_list('user_id', flat=True))
+    if owners or path.startswith(DOCUMENTS_PREFIX):
+        return owners
+    return None
+
+
+def _user(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except APIException:
+        return None
+    return authenticated[0] if authenticated else None
+
+
+def may_read(request, owners):
+    user = _user(request)
+    return user is not None and (user.is_staff or user.pk in owners)
+
+
+def validators(path, st):
+    """(strong ETag, Cache-Control) for a media file"""
+    blob = BLOB_RE.match(path)
+    if blob:
+        return quote_etag(blob.group(1)), IMMUTABLE
+    max_age = getattr(settings, 'MEDIA_MAX_AGE', 3600)
+    return quote_etag(f'{st.st_size:x}-{st.st_mtime_ns:x}'), f'public, max-age={max_age}'
+
+
+def byte_range(request, size, etag, last_modified):
+    """
+    (start, end) of the single range asked for, inclusive; None for the whole
+    file; raises ValueError when the range cannot be satisfied.
+    """
+    header = request.headers.get('Range', '')
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or not any(match.groups()):
+        # Absent, malformed or multi-range: the whole file is a valid answer
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range:
+        if if_range.startswith(('"', 'W/')):
+            if if_range != etag:
+                return None
+        elif parse_http_date_safe(if_range) != last_modified:
+            return None
+
+    first, last = match.groups()
+    if not first:
+        # bytes=-N: the final N bytes
+        length = int(last)
+        if not length or not size:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def _read(full_path, start, length):
+    with open(full_path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def file_response(request, full_path, st, etag, last_modified):
+    """The file, or the requested byte range of it, as a response"""
+    size = st.st_size
+    try:
+        requested = byte_range(request, size, etag, last_modified)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    content_type = _content_type(full_path)
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = size
+    elif requested is None:
+        # FileResponse goes through wsgi.file_wrapper, i.e. sendfile(2) where the server has it
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = requested
+        response = StreamingHttpResponse(_read(full_path, start, end - start + 1),
+                                         status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    full_path, st = _resolve(path)
+    etag, cache_control = validators(path, st)
+    owners = document_owners(path)
+    if owners is not None:
+        if not may_read(request, owners):
+            raise Http404('No such media file')
+        cache_control = PRIVATE
+    last_modified = int(st.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        mode = getattr(settings, 'MEDIA_SENDFILE', None)
+        if mode in ('x-sendfile', 'x-accel-redirect'):
+            response = HttpResponse(content_type=_content_type(full_path))
+            if mode == 'x-sendfile':
+                response['X-Sendfile'] = full_path
+            else:
+                response['X-Accel-Redirect'] = accel_prefix() + quote(path)
+        else:
+            response = file_response(request, full_path, st, etag, last_modified)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = cache_control
+    return response
+
+
+class SendfileEmulationMiddleware:
+    """Fulfil X-Sendfile / X-Accel-Redirect responses the way the front server would"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Under ASGI, stay async so async views are not pushed onto a thread
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.emulate(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.emulate(request, await self.get_response(request))
+
+    def emulate(self, request, response):
+        if not getattr(settings, 'MEDIA_SENDFILE_EMULATE', False):
+            return response
+
+        if response.has_header('X-Sendfile'):
+            full_path = response['X-Sendfile']
+        elif response.has_header('X-Accel-Redirect'):
+            location = response['X-Accel-Redirect']
+            if not location.startswith(accel_prefix()):
+                return response
+            full_path = safe_join(settings.MEDIA_ROOT, unquote(location[len(accel_prefix()):]))
+        else:
+            return response
+
+        served = file_response(request, full_path, os.stat(full_path), response['ETag'],
+                               parse_http_date_safe(response['Last-Modified']))
+        for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+            served[header] = response[header]
+        return served
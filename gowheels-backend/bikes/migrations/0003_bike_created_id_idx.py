@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bikes', '0002_otpverification_bike_is_verified_bike_number_plate_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(fields=['-created_at', '-id'], name='bike_created_id_idx'),
+        ),
+    ]
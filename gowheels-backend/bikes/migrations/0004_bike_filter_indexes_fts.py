@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:14
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_fts(apps, schema_editor):
+    from bikes.search import install_fts
+    install_fts(schema_editor.connection)
+
+
+def drop_fts(apps, schema_editor):
+    from bikes.search import uninstall_fts
+    uninstall_fts(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bikes', '0003_bike_created_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(fields=['bike_type', 'available', 'price_per_day'], name='bike_type_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(fields=['verification_status', 'available', 'price_per_day'], name='bike_status_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(django.db.models.functions.text.Lower('location'), models.F('available'), models.F('price_per_day'), name='bike_location_avail_price_idx'),
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
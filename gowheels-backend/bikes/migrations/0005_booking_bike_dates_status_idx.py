@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bikes', '0004_bike_filter_indexes_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['bike', 'start_date', 'end_date', 'status'], name='booking_bike_dates_status_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:17
+
+import datetime
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+EPOCH = datetime.date(2024, 1, 1)
+
+
+def backfill_occupancy(apps, schema_editor):
+    Booking = apps.get_model('bikes', 'Booking')
+    BikeOccupancy = apps.get_model('bikes', 'BikeOccupancy')
+    bits = defaultdict(int)
+    active = Booking.objects.filter(status__in=['pending', 'confirmed'])
+    for bike_id, start, end in active.values_list('bike_id', 'start_date', 'end_date').iterator():
+        first, last = max((start - EPOCH).days, 0), max((end - EPOCH).days, 0)
+        if last > first:
+            bits[bike_id] |= ((1 << (last - first)) - 1) << first
+    BikeOccupancy.objects.bulk_create([
+        BikeOccupancy(bike_id=bike_id, bitmap=value.to_bytes((value.bit_length() + 7) // 8, 'little'))
+        for bike_id, value in bits.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bikes', '0005_booking_bike_dates_status_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BikeOccupancy',
+            fields=[
+                ('bike', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='occupancy', serialize=False, to='bikes.bike')),
+                ('bitmap', models.BinaryField(default=bytes)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bikes', '0007_booking_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bike',
+            name='processed_images',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='processed_images',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
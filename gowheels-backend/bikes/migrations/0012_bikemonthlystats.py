@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:42
+
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+COUNTED = ('bookings', 'pending', 'confirmed', 'completed', 'cancelled', 'booked_days')
+
+
+def next_month(month):
+    return datetime.date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def backfill_stats(apps, schema_editor):
+    BikeMonthlyStats = apps.get_model('bikes', 'BikeMonthlyStats')
+    cells = defaultdict(lambda: {**dict.fromkeys(COUNTED, 0), 'revenue': Decimal('0.00')})
+    for name in ('Booking', 'BookingArchive'):
+        rows = apps.get_model('bikes', name).objects.values_list(
+            'bike_id', 'start_date', 'end_date', 'status', 'total_price',
+        )
+        for bike_id, start, end, status, price in rows.iterator():
+            cell = cells[bike_id, start.replace(day=1)]
+            cell['bookings'] += 1
+            cell[status] += 1
+            if status in ('confirmed', 'completed'):
+                cell['revenue'] += price
+            if status != 'cancelled':
+                month = start.replace(day=1)
+                while month < end:
+                    first, last = max(start, month), min(end, next_month(month))
+                    cells[bike_id, month]['booked_days'] += (last - first).days
+                    month = next_month(month)
+    BikeMonthlyStats.objects.bulk_create([
+        BikeMonthlyStats(bike_id=bike_id, month=month, **values)
+        for (bike_id, month), values in cells.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bikes', '0011_bookingarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BikeMonthlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('confirmed', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('booked_days', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('bike', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_stats', to='bikes.bike')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('bike', 'month'), name='bike_month_stats_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
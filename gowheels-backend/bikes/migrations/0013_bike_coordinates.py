@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:49
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def geocode_bikes(apps, schema_editor):
+    from bikes import geo
+
+    Bike = apps.get_model('bikes', 'Bike')
+    located = []
+    for bike in Bike.objects.only('id', 'location').iterator():
+        point = geo.geocode(bike.location)
+        if point:
+            bike.latitude, bike.longitude = point
+            bike.geo_cell = geo.cell(*point)
+            located.append(bike)
+    Bike.objects.bulk_update(located, ['latitude', 'longitude', 'geo_cell'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bikes', '0012_bikemonthlystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bike',
+            name='geo_cell',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='bike',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='bike',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(fields=['geo_cell'], name='bike_geo_cell_idx'),
+        ),
+        migrations.RunPython(geocode_bikes, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,14 @@
-from django.db import models
+import datetime
+import uuid
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .signals import bikes_bulk_created, bikes_bulk_updated, bookings_bulk_updated
+from .sqlite import write_transaction
 
 # Create your models here.
 
@@ -12,6 +21,7 @@ class UserProfile(models.Model):
     # Document uploads
     aadhaar_card = models.ImageField(upload_to='documents/aadhaar/', blank=True, null=True)
     aadhaar_verified = models.BooleanField(default=False)
+    processed_images = models.JSONField(default=dict, blank=True, editable=False)  # see image_pipeline.py
     
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -29,13 +39,32 @@ class OTPVerification(models.Model):
         ordering = ['-created_at']
     
     def is_valid(self):
-        from django.utils import timezone
         # OTP valid for 10 minutes
         return (timezone.now() - self.created_at).total_seconds() < 600
     
     def __str__(self):
         return f"{self.phone_number} - {self.otp}"
 
+class BikeQuerySet(models.QuerySet):
+    def set_verification(self, verification_status):
+        """Bulk verification change that still notifies bikes_bulk_updated receivers"""
+        with transaction.atomic():
+            bike_ids = list(self.values_list('id', flat=True))
+            updated = self.update(
+                is_verified=verification_status == 'verified',
+                verification_status=verification_status,
+                updated_at=timezone.now(),
+            )
+            bikes_bulk_updated.send(sender=Bike, bike_ids=bike_ids)
+        return updated
+    
+    def create_in_bulk(self, bikes, batch_size=None):
+        """bulk_create that still notifies bikes_bulk_created receivers"""
+        with transaction.atomic():
+            bikes = self.bulk_create(bikes, batch_size=batch_size)
+            bikes_bulk_created.send(sender=Bike, bikes=bikes)
+        return bikes
+
 class Bike(models.Model):
     BIKE_TYPES = [
         ('mountain', 'Mountain Bike'),
@@ -51,12 +80,17 @@ class Bike(models.Model):
     bike_type = models.CharField(max_length=20, choices=BIKE_TYPES)
     price_per_day = models.DecimalField(max_digits=8, decimal_places=2)
     location = models.CharField(max_length=200)
+    # Geocoded from location unless given; geo_cell indexes them (see bikes/geo.py)
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    geo_cell = models.IntegerField(null=True, blank=True, editable=False)
     image = models.ImageField(upload_to='bikes/', blank=True, null=True)
     available = models.BooleanField(default=True)
     
     # NEW: Verification fields
     number_plate = models.CharField(max_length=20, unique=True, null=True, blank=True)
     number_plate_image = models.ImageField(upload_to='bikes/plates/', null=True, blank=True)
+    processed_images = models.JSONField(default=dict, blank=True, editable=False)  # see image_pipeline.py
     is_verified = models.BooleanField(default=False)
     verification_status = models.CharField(
         max_length=20, 
@@ -71,9 +105,67 @@ class Bike(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BikeQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Backs the newest-first cursor pagination of the catalogue
+            models.Index(fields=['-created_at', '-id'], name='bike_created_id_idx'),
+            # Catalogue filters (see bikes/filters.py); price_per_day last for range scans
+            models.Index(fields=['bike_type', 'available', 'price_per_day'], name='bike_type_avail_price_idx'),
+            models.Index(fields=['verification_status', 'available', 'price_per_day'], name='bike_status_avail_price_idx'),
+            models.Index(Lower('location'), 'available', 'price_per_day', name='bike_location_avail_price_idx'),
+            # Radius searches scan a few geo_cell ranges
+            models.Index(fields=['geo_cell'], name='bike_geo_cell_idx'),
+        ]
+    
     def __str__(self):
         return self.title
 
+class SeasonalRate(models.Model):
+    """Owner-set daily price of a bike over [start_date, end_date) (see pricing.py)"""
+    bike = models.ForeignKey(Bike, on_delete=models.CASCADE, related_name='seasonal_rates')
+    name = models.CharField(max_length=100, blank=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    price_per_day = models.DecimalField(max_digits=8, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['bike', 'start_date'], name='seasonal_rate_bike_start_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.bike_id} - {self.name or 'season'} ({self.start_date} to {self.end_date})"
+
+class BookingQuerySet(models.QuerySet):
+    def active(self):
+        """Bookings that hold the bike (pending or confirmed)"""
+        return self.filter(status__in=Booking.ACTIVE_STATUSES)
+    
+    def overlapping(self, start_date, end_date):
+        """Bookings intersecting [start_date, end_date); end dates are exclusive"""
+        return self.filter(start_date__lt=end_date, end_date__gt=start_date)
+    
+    def update_status(self, status):
+        """Bulk status change that still notifies bookings_bulk_updated receivers"""
+        with write_transaction():
+            rows = list(self.values_list('bike_id', 'start_date', 'end_date'))
+            updated = self.update(status=status, updated_at=timezone.now())
+            bookings_bulk_updated.send(sender=Booking, bookings=rows)
+        return updated
+    
+    def archive(self):
+        """Move these bookings into BookingArchive; the post_delete receivers run for each"""
+        with write_transaction():
+            bookings = list(self.select_for_update().order_by('pk'))
+            BookingArchive.objects.bulk_create(
+                [BookingArchive.from_booking(booking) for booking in bookings], ignore_conflicts=True,
+            )
+            Booking.objects.filter(pk__in=[booking.pk for booking in bookings]).delete()
+        return len(bookings)
+
 class Booking(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -81,6 +173,14 @@ class Booking(models.Model):
         ('cancelled', 'Cancelled'),
         ('completed', 'Completed'),
     ]
+    ACTIVE_STATUSES = ('pending', 'confirmed')
+    # Moves the transition API allows (the admin actions can force any status)
+    TRANSITIONS = {
+        'pending': ('confirmed', 'cancelled'),
+        'confirmed': ('completed', 'cancelled'),
+        'cancelled': (),
+        'completed': (),
+    }
     
     bike = models.ForeignKey(Bike, on_delete=models.CASCADE, related_name='bookings')
     renter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
@@ -89,6 +189,126 @@ class Booking(models.Model):
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = BookingQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Overlap probes: bike equality, then a range scan on start_date
+            models.Index(fields=['bike', 'start_date', 'end_date', 'status'], name='booking_bike_dates_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.renter.username} - {self.bike.title}"
+
+class BookingArchive(models.Model):
+    """Finished bookings moved out of Booking by the retention job (see retention.py)"""
+    ARCHIVED_FIELDS = ('id', 'bike_id', 'renter_id', 'start_date', 'end_date', 'total_price', 'status',
+                       'created_at', 'updated_at')
+    
+    id = models.BigIntegerField(primary_key=True)  # the original Booking id
+    bike = models.ForeignKey(Bike, on_delete=models.CASCADE, related_name='archived_bookings')
+    renter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_bookings')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['renter', '-end_date'], name='archive_renter_end_idx'),
+            models.Index(fields=['bike', '-end_date'], name='archive_bike_end_idx'),
+        ]
+    
+    @classmethod
+    def from_booking(cls, booking):
+        return cls(**{field: getattr(booking, field) for field in cls.ARCHIVED_FIELDS})
+    
+    def __str__(self):
+        return f"{self.renter_id} - {self.bike_id} ({self.status}, archived)"
+
+class BikeOccupancy(models.Model):
+    """Per-bike bitmap with one bit per day, set while an active booking holds the bike"""
+    EPOCH = datetime.date(2024, 1, 1)  # bit 0; earlier days are never tracked
+    
+    bike = models.OneToOneField(Bike, on_delete=models.CASCADE, primary_key=True, related_name='occupancy')
+    bitmap = models.BinaryField(default=bytes)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @classmethod
+    def day_index(cls, day):
+        return max((day - cls.EPOCH).days, 0)
+    
+    @classmethod
+    def range_mask(cls, start_date, end_date):
+        """Bits for the days in [start_date, end_date)"""
+        first, last = cls.day_index(start_date), cls.day_index(end_date)
+        return ((1 << (last - first)) - 1) << first if last > first else 0
+    
+    @property
+    def bits(self):
+        return int.from_bytes(self.bitmap, 'little')
+    
+    @bits.setter
+    def bits(self, value):
+        self.bitmap = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+    
+    def is_free(self, start_date, end_date):
+        return not self.bits & self.range_mask(start_date, end_date)
+    
+    def __str__(self):
+        return f"{self.bike_id} - {bin(self.bits).count('1')} day(s) booked"
+
+
+class BikeMonthlyStats(models.Model):
+    """Per-bike, per-month booking rollup behind owner_stats, kept current by stats.py"""
+    bike = models.ForeignKey(Bike, on_delete=models.CASCADE, related_name='monthly_stats')
+    month = models.DateField()  # first day of the month
+    bookings = models.PositiveIntegerField(default=0)  # bookings starting this month, by status below
+    pending = models.PositiveIntegerField(default=0)
+    confirmed = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # confirmed + completed
+    booked_days = models.PositiveIntegerField(default=0)  # days of this month held by a live booking
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['bike', 'month'], name='bike_month_stats_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.bike_id} - {self.month:%Y-%m}"
+
+
+class MediaBlob(models.Model):
+    """One file in the content-addressed media store and how many row fields point at it"""
+    name = models.CharField(max_length=100, primary_key=True)
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveBigIntegerField()
+    references = models.PositiveIntegerField(default=0)
+    touched_at = models.DateTimeField(default=timezone.now)  # last stored; fresh blobs are never collected
+    
+    def __str__(self):
+        return f"{self.name} ({self.references} reference(s))"
+
+
+class ChunkedUpload(models.Model):
+    """A resumable upload in progress; its bytes so far live in a part file (see uploads.py)"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"{self.renter.username} - {self.bike.title}"
\ No newline at end of file
+        return f"{self.filename} ({self.offset}/{self.size})"
@@ -1,42 +1,119 @@
 # bikes/otp_service.py
-import requests
-import random
+import hashlib
+import hmac
+import secrets
+import time
 from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+
+from . import sms
+
+# Rate limits as sliding windows: at most uses requests in any window
+# seconds, (uses, window seconds). OTP_RATE_LIMITS overrides them.
+DEFAULT_RATE_LIMITS = {
+    'send:phone': (3, 360),
+    'send:ip': (10, 600),
+    'verify:phone': (5, 300),
+    'verify:ip': (20, 300),
+}
+
+
+def get_cache():
+    return caches[getattr(settings, 'OTP_CACHE_ALIAS', 'default')]
+
+
+def _claim(cache, key, limit, timeout, value=1):
+    """
+    Take one of limit uses of key for timeout seconds; the key of the use
+    taken, or None if all are held.
+
+    add() is atomic on every cache backend (incr() is not on the database
+    cache), so each use is a key of its own and add() decides who gets it.
+    """
+    uses = [f'{key}:{n}' for n in range(limit)]
+    taken = cache.get_many(uses)
+    for use in uses:
+        if use not in taken and cache.add(use, value, timeout):
+            return use
+    return None
+
+
+def _rate_limit(action, **identities):
+    """
+    Use up one request of every limit of action, or raise Throttled if any is
+    exhausted.
+
+    Each request holds one of the uses for (at least) window seconds after
+    it was made, so no window (wherever it starts) sees more than uses requests;
+    fixed windows would let twice that through around their boundary.
+    """
+    limits = getattr(settings, 'OTP_RATE_LIMITS', DEFAULT_RATE_LIMITS)
+    cache, now = get_cache(), time.time()
+    claimed = []
+    for kind, value in identities.items():
+        limit, window = limits[f'{action}:{kind}']
+        key = f'otp:rate:{action}:{kind}:{value}'
+        # + 1: the database cache keeps expiry times to the whole second
+        use = _claim(cache, key, limit, window + 1, value=now)
+        if use is None:
+            # A refused request does not count against the other limits
+            cache.delete_many(claimed)
+            held = cache.get_many([f'{key}:{n}' for n in range(limit)]).values()
+            raise Throttled(wait=max(min(held, default=now) + window - now, 1))
+        claimed.append(use)
+
+
+def _digest(phone_number, otp):
+    return hashlib.sha256(f'{settings.SECRET_KEY}:{phone_number}:{otp}'.encode()).hexdigest()
+
 
 class OTPService:
     
     @staticmethod
     def generate_otp():
         """Generate 6-digit OTP"""
-        return str(random.randint(100000, 999999))
+        return str(secrets.randbelow(900000) + 100000)
     
     @staticmethod
-    def send_otp_msg91(phone_number, otp):
-        """Send OTP using MSG91 - FREE for India"""
-        
-        # FOR TESTING: Print OTP to console (remove in production)
-        print(f"📱 OTP for {phone_number}: {otp}")
-        
-        # Uncomment below when you have MSG91 credentials
+    def issue(phone_number, ip):
         """
-        url = "https://api.msg91.com/api/v5/otp"
-        
-        payload = {
-            "template_id": settings.MSG91_TEMPLATE_ID,
-            "mobile": f"91{phone_number}",
-            "authkey": settings.MSG91_AUTH_KEY,
-            "otp": otp
-        }
-        
-        headers = {"Content-Type": "application/json"}
-        
-        try:
-            response = requests.post(url, json=payload, headers=headers)
-            return response.status_code == 200
-        except Exception as e:
-            print(f"Error sending OTP: {e}")
-            return False
+        New OTP for phone_number, replacing any earlier one.
+
+        Only a hash is kept, under a cache key that expires with the OTP, so
+        expiry costs nothing and floods leave no rows behind.
         """
-        
-        # For testing, always return True
-        return True
\ No newline at end of file
+        _rate_limit('send', phone=phone_number, ip=ip)
+        otp = OTPService.generate_otp()
+        ttl = getattr(settings, 'OTP_TTL', 600)
+        entry = {'id': secrets.token_hex(8), 'digest': _digest(phone_number, otp), 'expires': time.time() + ttl}
+        get_cache().set(f'otp:code:{phone_number}', entry, ttl)
+        return otp
+    
+    @staticmethod
+    def verify(phone_number, otp, ip):
+        """True if otp is the live OTP for phone_number; it is then used up"""
+        _rate_limit('verify', phone=phone_number, ip=ip)
+        cache, key = get_cache(), f'otp:code:{phone_number}'
+        entry = cache.get(key)
+        remaining = entry['expires'] - time.time() if entry else 0
+        if remaining <= 0:
+            return False
+        # Every guess at this code takes one of its attempts before it is checked
+        attempts = getattr(settings, 'OTP_MAX_ATTEMPTS', 5)
+        if _claim(cache, f"otp:attempt:{entry['id']}", attempts, int(remaining) + 1) is None:
+            # Too many guesses at this code; a new one has to be requested
+            cache.delete(key)
+            return False
+        if not hmac.compare_digest(entry['digest'], _digest(phone_number, str(otp))):
+            return False
+        # Of concurrent right guesses only one gets to use the code
+        if not cache.add(f"otp:used:{entry['id']}", 1, int(remaining) + 1):
+            return False
+        cache.delete(key)
+        return True
+    
+    @staticmethod
+    def send_otp_msg91(phone_number, otp):
+        """Queue the OTP SMS (MSG91 batch API); returns without waiting for the gateway"""
+        return sms.send_otp(phone_number, otp)
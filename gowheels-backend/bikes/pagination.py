@@ -0,0 +1,64 @@
+from rest_framework.pagination import CursorPagination
+
+
+class _Fetch(Exception):
+    """Raised by _Staged where the paginator reads its page"""
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+
+class _Staged:
+    """
+    What the paginator sees instead of the queryset in apaginate_queryset.
+
+    order_by() and filter() pass through; slicing raises _Fetch with the
+    sliced queryset on the first run and returns the rows fetched for it on
+    the second.
+    """
+
+    def __init__(self, queryset, rows=None):
+        self.queryset = queryset
+        self.rows = rows
+
+    def order_by(self, *fields):
+        return _Staged(self.queryset.order_by(*fields), self.rows)
+
+    def filter(self, *args, **kwargs):
+        return _Staged(self.queryset.filter(*args, **kwargs), self.rows)
+
+    def __getitem__(self, key):
+        if self.rows is None:
+            raise _Fetch(self.queryset[key])
+        return self.rows
+
+
+class BikeCursorPagination(CursorPagination):
+    """Newest-first cursor pagination over (created_at, id)"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() with the page read through the async ORM.
+
+        The stock method runs twice: once up to the query it would send, and
+        again on the rows fetched for that query, so the cursor handling
+        stays DRF's own.
+        """
+        try:
+            return self.paginate_queryset(_Staged(queryset), request, view)
+        except _Fetch as fetch:
+            rows = [row async for row in fetch.queryset]
+        return self.paginate_queryset(_Staged(queryset, rows), request, view)
+
+    def get_paginated_data(self, data):
+        """The body get_paginated_response() would return"""
+        return {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+
+
+class ArchiveCursorPagination(BikeCursorPagination):
+    """Most recently ended first"""
+    ordering = ('-end_date', '-id')
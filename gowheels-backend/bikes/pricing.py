@@ -0,0 +1,202 @@
+# bikes/pricing.py
+"""
+Trip prices.
+
+quote_many() prices any number of (bike_id, start_date, end_date) trips in
+one pass: the PriceTable of every bike involved (its daily price and
+seasonal rates) comes from the cache in one get_many, and the bikes that
+miss are loaded with one query for prices and one for rates. Tables are
+keyed by the bike's version counter from cache.py, so anything that
+invalidates the bike (saving it, changing its rates) retires its table too.
+Version counters live in the default cache, which need not be shared by all
+workers, so cached tables only serve the read-only quote endpoint; bookings
+are priced with booking_quote() from the rows themselves.
+
+Each trip starts at price_per_day x days; PRICING_RULES then adjust it in
+order. A rule is a class whose instances are called with (quote, table) and
+record their effect with quote.adjust(). The built-in rules are seasonal
+rates, the weekend surcharge and the weekly / monthly length discounts,
+configured by PRICING_* settings.
+"""
+import bisect
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from . import cache
+from .models import Bike, SeasonalRate
+
+CENT = Decimal('0.01')
+TABLE_KEY = 'pricing:table:{}:{}'
+
+DEFAULT_RULES = (
+    'bikes.pricing.SeasonalRates',
+    'bikes.pricing.WeekendSurcharge',
+    'bikes.pricing.LengthDiscount',
+)
+
+
+def money(value):
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class PriceTable:
+    """What the rules need to know about one bike; cached per bike version"""
+
+    def __init__(self, price_per_day, seasons=()):
+        self.price_per_day = price_per_day
+        # (start_date, end_date, price_per_day); a later start wins on overlap
+        self.seasons = sorted(seasons)
+        self.starts = [start for start, _, _ in self.seasons]
+
+    def seasonal_price(self, day):
+        index = bisect.bisect_right(self.starts, day)
+        for start, end, price in reversed(self.seasons[:index]):
+            if day < end:
+                return price
+        return None
+
+
+class Quote:
+    def __init__(self, bike_id, start_date, end_date, table):
+        self.bike_id = bike_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.days = [start_date + timedelta(days=n) for n in range((end_date - start_date).days)]
+        self.rates = [table.price_per_day] * len(self.days)
+        self.base = money(table.price_per_day * len(self.days))
+        self.adjustments = []
+
+    def adjust(self, rule, amount):
+        amount = money(amount)
+        if amount:
+            self.adjustments.append((rule, amount))
+
+    @property
+    def total(self):
+        return self.base + sum(amount for _, amount in self.adjustments)
+
+    def as_dict(self):
+        return {
+            'bike_id': self.bike_id,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'days': len(self.days),
+            'base': str(self.base),
+            'adjustments': [{'rule': rule, 'amount': str(amount)} for rule, amount in self.adjustments],
+            'total': str(self.total),
+        }
+
+
+class SeasonalRates:
+    """Owner-set SeasonalRate prices replace the daily price on the days they cover"""
+
+    def __call__(self, quote, table):
+        if not table.seasons:
+            return
+        change = Decimal(0)
+        for index, day in enumerate(quote.days):
+            price = table.seasonal_price(day)
+            if price is not None:
+                change += price - quote.rates[index]
+                quote.rates[index] = price
+        quote.adjust('seasonal', change)
+
+
+class WeekendSurcharge:
+    """PRICING_WEEKEND_SURCHARGE (a fraction) on top of the rate of Saturdays and Sundays"""
+
+    def __call__(self, quote, table):
+        share = Decimal(str(getattr(settings, 'PRICING_WEEKEND_SURCHARGE', 0)))
+        if not share:
+            return
+        extra = Decimal(0)
+        for index, day in enumerate(quote.days):
+            if day.weekday() >= 5:
+                surcharge = quote.rates[index] * share
+                quote.rates[index] += surcharge
+                extra += surcharge
+        quote.adjust('weekend', extra)
+
+
+class LengthDiscount:
+    """The largest PRICING_LENGTH_DISCOUNTS tier a trip is long enough for, off its subtotal"""
+
+    def __call__(self, quote, table):
+        tiers = getattr(settings, 'PRICING_LENGTH_DISCOUNTS', {})
+        eligible = [(min_days, name, Decimal(str(share))) for name, (min_days, share) in tiers.items()
+                    if len(quote.days) >= min_days]
+        if eligible:
+            _, name, share = max(eligible)
+            quote.adjust(name, -quote.total * share)
+
+
+@lru_cache(maxsize=None)
+def _rules(paths):
+    return [import_string(path)() for path in paths]
+
+
+def rules():
+    return _rules(tuple(getattr(settings, 'PRICING_RULES', DEFAULT_RULES)))
+
+
+def price_tables(bike_ids):
+    """{bike_id: PriceTable} for the bikes that exist"""
+    bike_ids = set(bike_ids)
+    if not bike_ids:
+        return {}
+    store = cache.get_cache()
+    keys = {bike_id: TABLE_KEY.format(bike_id, version) for bike_id, version in cache.bike_versions(bike_ids).items()}
+    cached = store.get_many(keys.values())
+    tables = {bike_id: cached[key] for bike_id, key in keys.items() if key in cached}
+
+    missing = bike_ids - set(tables)
+    if missing:
+        seasons = {}
+        for bike_id, start, end, price in SeasonalRate.objects.filter(bike_id__in=missing).values_list(
+            'bike_id', 'start_date', 'end_date', 'price_per_day',
+        ):
+            seasons.setdefault(bike_id, []).append((start, end, price))
+        loaded = {
+            bike_id: PriceTable(price, seasons.get(bike_id, ()))
+            for bike_id, price in Bike.objects.filter(pk__in=missing).values_list('id', 'price_per_day')
+        }
+        store.set_many({keys[bike_id]: table for bike_id, table in loaded.items()},
+                       getattr(settings, 'PRICING_TABLE_TIMEOUT', 3600))
+        tables.update(loaded)
+    return tables
+
+
+def _apply(bike_id, start_date, end_date, table, active_rules):
+    quote = Quote(bike_id, start_date, end_date, table)
+    for rule in active_rules:
+        rule(quote, table)
+    return quote
+
+
+def quote_many(trips):
+    """Quote (or None for an unknown bike) for each (bike_id, start_date, end_date), in order"""
+    trips = list(trips)
+    tables = price_tables(bike_id for bike_id, _, _ in trips)
+    active_rules = rules()
+    return [
+        _apply(bike_id, start_date, end_date, tables[bike_id], active_rules) if bike_id in tables else None
+        for bike_id, start_date, end_date in trips
+    ]
+
+
+def quote(bike_id, start_date, end_date):
+    return quote_many([(bike_id, start_date, end_date)])[0]
+
+
+def booking_quote(bike, start_date, end_date):
+    """
+    Quote for a booking of bike (an instance, locked by the caller), from its
+    own price and its current seasonal rates rather than a cached table
+    """
+    seasons = SeasonalRate.objects.filter(bike=bike).values_list('start_date', 'end_date', 'price_per_day')
+    table = PriceTable(bike.price_per_day, seasons)
+    return _apply(bike.pk, start_date, end_date, table, rules())
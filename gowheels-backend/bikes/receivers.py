@@ -0,0 +1,120 @@
+# bikes/receivers.py
+from collections import Counter
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache, geo, image_pipeline, storage
+from .availability import refresh_occupancy, refresh_occupancy_for
+from .models import Bike, Booking, SeasonalRate, UserProfile
+from .signals import bikes_bulk_created, bikes_bulk_updated, bookings_bulk_updated
+from .stats import refresh_stats_for
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booking_range(sender, instance, **kwargs):
+    # The dates may move on save; the old range has to be refreshed as well
+    instance._previous_range = None
+    if instance.pk:
+        instance._previous_range = (
+            Booking.objects.filter(pk=instance.pk).values_list('bike_id', 'start_date', 'end_date').first()
+        )
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, **kwargs):
+    rows = [(instance.bike_id, instance.start_date, instance.end_date)]
+    if getattr(instance, '_previous_range', None):
+        rows.append(instance._previous_range)
+    refresh_occupancy_for(rows)
+    refresh_stats_for(rows)
+    # Details asked for with ?start_date=&end_date= depend on bookings too
+    cache.invalidate_bikes([bike_id for bike_id, _, _ in rows])
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    # Deferred: when the bike itself is being deleted its occupancy row goes
+    # with it, and refreshing mid-cascade would recreate it
+    transaction.on_commit(partial(
+        refresh_occupancy, instance.bike_id, [(instance.start_date, instance.end_date)]
+    ))
+    transaction.on_commit(partial(
+        refresh_stats_for, [(instance.bike_id, instance.start_date, instance.end_date)]
+    ))
+    cache.invalidate_bikes([instance.bike_id])
+
+
+@receiver(bookings_bulk_updated)
+def bookings_bulk_updated_handler(sender, bookings, **kwargs):
+    refresh_occupancy_for(bookings)
+    refresh_stats_for(bookings)
+    cache.invalidate_bikes([bike_id for bike_id, _, _ in bookings])
+
+
+@receiver(pre_save, sender=Bike)
+def locate_bike(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'location', 'latitude', 'longitude'} & set(update_fields):
+        return
+    previous = None
+    if not instance._state.adding:
+        previous = Bike.objects.filter(pk=instance.pk).values_list('location', 'latitude', 'longitude').first()
+    geo.locate(instance, previous)
+
+
+@receiver(post_save, sender=Bike)
+@receiver(post_delete, sender=Bike)
+def bike_changed(sender, instance, **kwargs):
+    cache.invalidate_bikes([instance.pk])
+
+
+@receiver(pre_save, sender=Bike)
+@receiver(pre_save, sender=UserProfile)
+def remember_stored_files(sender, instance, **kwargs):
+    instance._previous_files = None
+    if not instance._state.adding:
+        instance._previous_files = storage.stored_references(sender, instance.pk)
+
+
+@receiver(post_save, sender=Bike)
+@receiver(post_save, sender=UserProfile)
+def count_stored_files(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_files', None) or Counter()
+    storage.update_references(previous, storage.references_of(instance))
+
+
+@receiver(post_delete, sender=Bike)
+@receiver(post_delete, sender=UserProfile)
+def release_stored_files(sender, instance, **kwargs):
+    storage.update_references(storage.references_of(instance), Counter())
+
+
+@receiver(post_save, sender=Bike)
+@receiver(post_save, sender=UserProfile)
+def process_uploaded_images(sender, instance, **kwargs):
+    image_pipeline.schedule(instance)
+
+
+@receiver(post_save, sender=SeasonalRate)
+@receiver(post_delete, sender=SeasonalRate)
+def seasonal_rate_changed(sender, instance, **kwargs):
+    # Retires the bike's cached price table (see pricing.py)
+    cache.invalidate_bikes([instance.bike_id])
+
+
+@receiver(bikes_bulk_updated)
+def bikes_bulk_updated_handler(sender, bike_ids, **kwargs):
+    cache.invalidate_bikes(bike_ids)
+
+
+@receiver(bikes_bulk_created)
+def bikes_bulk_created_handler(sender, bikes, **kwargs):
+    # What the per-row post_save receivers do, once for the batch
+    files = Counter()
+    for bike in bikes:
+        files.update(storage.references_of(bike))
+        image_pipeline.schedule(bike)
+    storage.update_references(Counter(), files)
+    cache.invalidate_bikes([bike.pk for bike in bikes])
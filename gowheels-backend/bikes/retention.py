@@ -0,0 +1,59 @@
+# bikes/retention.py
+"""
+Retention: purge expired OTP rows and archive finished bookings.
+
+Both work in short batches walked in primary key order, each in its own
+transaction, so no long lock is held and no batch rescans rows an earlier
+one already passed. Run by ``manage.py run_retention`` (once, or on a loop).
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, OTPVerification
+
+ARCHIVED_STATUSES = ('completed', 'cancelled')
+
+
+def batch_size():
+    return getattr(settings, 'RETENTION_BATCH_SIZE', 500)
+
+
+def _batches(queryset, size):
+    """Successive lists of up to size primary keys from queryset, in pk order"""
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        ids = list(page.order_by('pk').values_list('pk', flat=True)[:size])
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def purge_expired_otps(size=None, pause=0.0):
+    """Delete OTPVerification rows past their validity; returns how many"""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'OTP_TTL', 600))
+    deleted = 0
+    for ids in _batches(OTPVerification.objects.filter(created_at__lt=cutoff), size or batch_size()):
+        with transaction.atomic():
+            deleted += OTPVerification.objects.filter(pk__in=ids).delete()[0]
+        time.sleep(pause)
+    return deleted
+
+
+def archive_bookings(horizon_days=None, size=None, pause=0.0):
+    """Move completed/cancelled bookings that ended before the horizon; returns how many"""
+    if horizon_days is None:
+        horizon_days = getattr(settings, 'BOOKING_ARCHIVE_AFTER_DAYS', 180)
+    cutoff = timezone.localdate() - timedelta(days=horizon_days)
+    finished = Booking.objects.filter(status__in=ARCHIVED_STATUSES, end_date__lt=cutoff)
+    archived = 0
+    for ids in _batches(finished, size or batch_size()):
+        # Re-filter: a booking may have changed status since it was listed
+        archived += finished.filter(pk__in=ids).archive()
+        time.sleep(pause)
+    return archived
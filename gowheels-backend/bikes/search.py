@@ -0,0 +1,95 @@
+# bikes/search.py
+import re
+
+from django.db import connection, connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'bikes_bike_fts'
+
+# SQLite keeps an external-content FTS5 index over bikes_bike in sync with
+# triggers. Django rebuilds SQLite tables on some schema changes, which drops
+# the triggers, so they are (re)installed idempotently after every migrate.
+SQLITE_FTS_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, content='bikes_bike', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON bikes_bike BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON bikes_bike BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON bikes_bike BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+POSTGRES_FTS_SQL = [
+    """CREATE INDEX IF NOT EXISTS bike_fts_idx ON bikes_bike
+        USING GIN (to_tsvector('english', title || ' ' || description))""",
+]
+
+POSTGRES_MATCH_SQL = (
+    "to_tsvector('english', bikes_bike.title || ' ' || bikes_bike.description) "
+    "@@ plainto_tsquery('english', %s)"
+)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def install_fts(conn=connection):
+    """Create the full-text index for the given database connection"""
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            triggers = [f'{FTS_TABLE}_{suffix}' for suffix in ('ai', 'ad', 'au')]
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+                triggers,
+            )
+            triggers_missing = cursor.fetchone()[0] < len(triggers)
+            for sql in SQLITE_FTS_SQL:
+                cursor.execute(sql)
+            if triggers_missing:
+                # Rows written while the triggers were gone are not indexed
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif conn.vendor == 'postgresql':
+            for sql in POSTGRES_FTS_SQL:
+                cursor.execute(sql)
+
+
+def uninstall_fts(conn=connection):
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif conn.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS bike_fts_idx')
+
+
+def fts5_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a prefix"""
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(text))
+
+
+def search_bikes(queryset, text):
+    """Filter a Bike queryset by free text over title and description"""
+    text = text.strip()
+    if not TOKEN_RE.search(text):
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [fts5_query(text)],
+        ))
+    if vendor == 'postgresql':
+        return queryset.filter(RawSQL(POSTGRES_MATCH_SQL, [text], output_field=BooleanField()))
+    return queryset.filter(Q(title__icontains=text) | Q(description__icontains=text))
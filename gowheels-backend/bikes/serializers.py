@@ -1,9 +1,35 @@
+from contextlib import ExitStack
+from functools import partial
+
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Bike, Booking, UserProfile, OTPVerification
+from .models import Bike, Booking, BookingArchive, ChunkedUpload, SeasonalRate, UserProfile, OTPVerification
+from .fieldsets import FULL
+from .image_pipeline import current_variants
+from .uploads import attach, completed_upload, max_size
+
+class ShapedSerializerMixin:
+    """Applies ?fields= / ?expand= (see bikes/fieldsets.py) to read output"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        shape = getattr(self, 'shape', None) or self.context.get('shape', FULL)
+        if shape is FULL:
+            return fields
+        for name, field in list(fields.items()):
+            if field.write_only:
+                continue
+            if not shape.includes(name):
+                del fields[name]
+            elif isinstance(field, serializers.BaseSerializer):
+                if shape.expands(name):
+                    field.shape = shape.child(name)
+                else:
+                    fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+        return fields
 
 # Existing serializers...
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ShapedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
@@ -45,10 +71,14 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['phone_verified', 'aadhaar_verified']
 
 # UPDATED: Bike Serializer with verification fields
-class BikeSerializer(serializers.ModelSerializer):
+class BikeSerializer(ShapedSerializerMixin, serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     number_plate_image = serializers.SerializerMethodField()
+    # Ids of finalized chunked uploads to store as the images
+    image_upload = serializers.UUIDField(write_only=True, required=False)
+    number_plate_image_upload = serializers.UUIDField(write_only=True, required=False)
 
     def get_image(self, obj):
         if obj.image:
@@ -56,6 +86,21 @@ class BikeSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url) if request else obj.image.url
         return None
 
+    def get_image_variants(self, obj):
+        """List/detail thumbnail URLs per format, null until processing has finished"""
+        variants = current_variants(obj.processed_images, 'image', obj.image.name)
+        if variants is None:
+            return None
+        request = self.context.get('request')
+        storage = obj.image.storage
+        return {
+            variant: {
+                fmt: request.build_absolute_uri(storage.url(name)) if request else storage.url(name)
+                for fmt, name in formats.items()
+            }
+            for variant, formats in variants.items()
+        }
+
     def get_number_plate_image(self, obj):
         if obj.number_plate_image:
             request = self.context.get('request')
@@ -65,17 +110,118 @@ class BikeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Bike
         fields = ['id', 'owner', 'title', 'description', 'bike_type',
-                  'price_per_day', 'location', 'image', 'available',
+                  'price_per_day', 'location', 'latitude', 'longitude', 'image', 'image_variants', 'available',
                   'number_plate', 'number_plate_image', 'is_verified',
-                  'verification_status', 'created_at', 'updated_at']
+                  'verification_status', 'created_at', 'updated_at',
+                  'image_upload', 'number_plate_image_upload']
         read_only_fields = ['owner', 'is_verified', 'verification_status']
 
-class BookingSerializer(serializers.ModelSerializer):
+    def validate_image_upload(self, value):
+        return completed_upload(self.context['request'].user, value, image=True)
+
+    def validate_number_plate_image_upload(self, value):
+        return completed_upload(self.context['request'].user, value, image=True)
+
+    def create(self, validated_data):
+        return self._save_with_uploads(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self._save_with_uploads(partial(super().update, instance), validated_data)
+
+    def _save_with_uploads(self, save, validated_data):
+        with ExitStack() as stack:
+            for field in ('image', 'number_plate_image'):
+                upload = validated_data.pop(f'{field}_upload', None)
+                if upload is not None:
+                    validated_data[field] = stack.enter_context(attach(upload))
+            return save(validated_data)
+
+class BikeImportSerializer(serializers.ModelSerializer):
+    """One row of a bulk fleet import (see bikes/fleet_import.py)"""
+    # Names of files in the images zip
+    image = serializers.CharField(required=False, allow_blank=True)
+    number_plate_image = serializers.CharField(required=False, allow_blank=True)
+
+    class Meta:
+        model = Bike
+        fields = ['title', 'description', 'bike_type', 'price_per_day', 'location', 'latitude', 'longitude',
+                  'available', 'number_plate', 'image', 'number_plate_image']
+        # Checked once per batch by the importer instead of once per row
+        extra_kwargs = {'number_plate': {'validators': []}}
+
+class BookingTransitionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=10000)
+    status = serializers.ChoiceField(choices=Booking.STATUS_CHOICES)
+
+class TripSerializer(serializers.Serializer):
+    bike_id = serializers.IntegerField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs['end_date'] <= attrs['start_date']:
+            raise serializers.ValidationError({'end_date': 'End date must be after start date.'})
+        if (attrs['end_date'] - attrs['start_date']).days > 366:
+            raise serializers.ValidationError({'end_date': 'Trips may be at most 366 days long.'})
+        return attrs
+
+class SeasonalRateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeasonalRate
+        fields = ['id', 'bike', 'name', 'start_date', 'end_date', 'price_per_day', 'created_at']
+
+    def validate_bike(self, bike):
+        if bike.owner_id != self.context['request'].user.id:
+            raise serializers.ValidationError('You can only set rates for your own bikes.')
+        return bike
+
+    def validate(self, attrs):
+        bike = attrs.get('bike', getattr(self.instance, 'bike', None))
+        start = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if end <= start:
+            raise serializers.ValidationError({'end_date': 'End date must be after start date.'})
+        clash = SeasonalRate.objects.filter(bike=bike, start_date__lt=end, end_date__gt=start)
+        if self.instance is not None:
+            clash = clash.exclude(pk=self.instance.pk)
+        if clash.exists():
+            raise serializers.ValidationError('This overlaps another seasonal rate of the bike.')
+        return attrs
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'filename', 'size', 'offset', 'sha256', 'completed_at', 'created_at']
+        read_only_fields = ['offset', 'sha256', 'completed_at']
+
+    def validate_size(self, value):
+        if value > max_size():
+            raise serializers.ValidationError(f'Uploads may be at most {max_size()} bytes.')
+        return value
+
+class BookingSerializer(ShapedSerializerMixin, serializers.ModelSerializer):
     bike = BikeSerializer(read_only=True)
     renter = UserSerializer(read_only=True)
+    bike_id = serializers.IntegerField(write_only=True)
+    
+    def validate(self, attrs):
+        # Partial updates keep the booking's other date
+        start = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if end <= start:
+            raise serializers.ValidationError({'end_date': 'End date must be after start date.'})
+        return attrs
     
     class Meta:
         model = Booking
-        fields = ['id', 'bike', 'renter', 'start_date', 'end_date', 
+        fields = ['id', 'bike', 'bike_id', 'renter', 'start_date', 'end_date', 
                   'total_price', 'status', 'created_at']
-        read_only_fields = ['renter', 'status']
\ No newline at end of file
+        read_only_fields = ['renter', 'status', 'total_price']
+
+class BookingArchiveSerializer(serializers.ModelSerializer):
+    bike_title = serializers.CharField(source='bike.title', read_only=True)
+
+    class Meta:
+        model = BookingArchive
+        fields = ['id', 'bike', 'bike_title', 'renter', 'start_date', 'end_date',
+                  'total_price', 'status', 'created_at', 'archived_at']
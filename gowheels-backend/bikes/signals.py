@@ -0,0 +1,14 @@
+# bikes/signals.py
+from django.dispatch import Signal
+
+# Sent after bookings change through QuerySet.update(), which skips
+# pre_save/post_save. Receivers get bookings=[(bike_id, start_date, end_date), ...]
+# describing every affected row, so side effects run once per batch.
+bookings_bulk_updated = Signal()
+
+# Same for Bike rows, with bike_ids=[...]
+bikes_bulk_updated = Signal()
+
+# Sent after Bike rows are inserted with bulk_create, which skips post_save.
+# Receivers get bikes=[Bike, ...], the saved instances with their pks
+bikes_bulk_created = Signal()
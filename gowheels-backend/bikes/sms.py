@@ -0,0 +1,183 @@
+# bikes/sms.py
+"""
+Outbound OTP SMS delivery.
+
+send_otp() only enqueues. Worker threads drain the queue in batches (up to
+SMS_BATCH_SIZE messages, collected for at most SMS_BATCH_WINDOW seconds)
+and post each batch to the gateway's multi-recipient endpoint over one
+pooled requests.Session with timeouts. A batch is only sent again when the
+gateway cannot have acted on it: the connection could not be made, or it
+answered 429. Those are retried by urllib3 with exponential backoff, and
+that is the only retry layer. After a read timeout, a dropped connection
+or a 5xx the SMS may already be on its way, so the batch is logged and
+dropped instead; the user can always ask for a new OTP.
+
+Without SMS_GATEWAY_URL the codes are printed to the console, as before.
+``manage.py fake_sms_gateway`` and ``manage.py bench_sms`` run against a
+local stand-in gateway (see fake_gateway.py).
+"""
+import logging
+import queue
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayError(Exception):
+    pass
+
+
+class Gateway:
+    """Client for an MSG91-style endpoint taking many OTP recipients per request"""
+
+    def __init__(self, url, auth_key='', template_id='', timeout=(3.05, 10), retries=3, backoff=0.5,
+                 pool_size=4):
+        self.url = url
+        self.template_id = template_id
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'authkey': auth_key})
+        # The POST is not idempotent: once the gateway may have seen it,
+        # resending risks a second SMS
+        retry = Retry(
+            total=None,
+            connect=retries,
+            read=0,
+            other=0,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429,),
+            allowed_methods=frozenset({'POST'}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            settings.SMS_GATEWAY_URL,
+            auth_key=getattr(settings, 'MSG91_AUTH_KEY', ''),
+            template_id=getattr(settings, 'MSG91_TEMPLATE_ID', ''),
+            timeout=getattr(settings, 'SMS_TIMEOUT', (3.05, 10)),
+            retries=getattr(settings, 'SMS_RETRIES', 3),
+            pool_size=getattr(settings, 'SMS_WORKERS', 2),
+        )
+
+    def send_batch(self, messages):
+        """Send [(phone_number, otp), ...] in one request"""
+        payload = {
+            'template_id': self.template_id,
+            'recipients': [{'mobiles': f'91{phone}', 'otp': otp} for phone, otp in messages],
+        }
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        if response.status_code != 200:
+            raise GatewayError(f'Gateway answered {response.status_code}: {response.text[:200]}')
+
+
+class DeliveryQueue:
+    """Bounded in-process queue drained in batches by worker threads"""
+
+    def __init__(self, gateway, batch_size=50, batch_window=0.05, workers=2, maxsize=10000):
+        self.gateway = gateway
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.workers = workers
+        self.queue = queue.Queue(maxsize)
+        self.stats = {'sent': 0, 'failed': 0, 'batches': 0}
+        self._stats_lock = threading.Lock()
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def enqueue(self, phone_number, otp):
+        """False when the queue is full"""
+        self._start()
+        try:
+            self.queue.put_nowait((phone_number, otp))
+        except queue.Full:
+            logger.error('SMS queue full; dropping OTP for %s', phone_number)
+            return False
+        return True
+
+    def join(self):
+        """Block until everything enqueued so far was delivered or given up on"""
+        self.queue.join()
+
+    def _start(self):
+        with self._start_lock:
+            if not self._started:
+                for n in range(self.workers):
+                    threading.Thread(target=self._work, name=f'sms-{n}', daemon=True).start()
+                self._started = True
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._deliver(batch)
+            except Exception:
+                logger.exception('SMS delivery crashed')
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _deliver(self, batch):
+        # The gateway session already retried what was safe to retry
+        try:
+            self.gateway.send_batch(batch)
+        except (requests.RequestException, GatewayError) as e:
+            logger.error('Giving up on %d OTP SMS: %s', len(batch), e)
+            self._count(failed=len(batch), batches=1)
+        else:
+            self._count(sent=len(batch), batches=1)
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for key, delta in deltas.items():
+                self.stats[key] += delta
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = DeliveryQueue(
+                Gateway.from_settings(),
+                batch_size=getattr(settings, 'SMS_BATCH_SIZE', 50),
+                batch_window=getattr(settings, 'SMS_BATCH_WINDOW', 0.05),
+                workers=getattr(settings, 'SMS_WORKERS', 2),
+                maxsize=getattr(settings, 'SMS_QUEUE_SIZE', 10000),
+            )
+        return _queue
+
+
+def send_otp(phone_number, otp):
+    """Hand an OTP SMS to the delivery queue; True once it is queued"""
+    if not getattr(settings, 'SMS_GATEWAY_URL', ''):
+        print(f"📱 OTP for {phone_number}: {otp}")
+        return True
+    return get_queue().enqueue(phone_number, otp)
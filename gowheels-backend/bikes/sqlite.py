@@ -0,0 +1,78 @@
+# bikes/sqlite.py
+"""
+Tuned SQLite mode for single-node deployments (SQLITE_TUNED).
+
+Every new connection runs SQLITE_PRAGMAS (see settings): WAL journaling so
+readers never wait for the writer, synchronous=NORMAL, a busy timeout so
+writers queue for the lock instead of failing, and bigger mmap and page
+caches.
+
+A busy timeout does not help a transaction that has read and then wants to
+write: SQLite cannot let it wait, since its snapshot may be stale, and it
+fails at once with "database is locked". write_transaction() starts the
+booking write paths with BEGIN IMMEDIATE instead, taking the write lock
+before the first read. retry_on_lock() reruns a whole transaction, with
+backoff, when the lock still was not free within the timeout.
+
+On other databases, or with SQLITE_TUNED off, both are a plain
+transaction.atomic() and a plain call.
+"""
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+
+def tuned(connection):
+    return connection.vendor == 'sqlite' and getattr(settings, 'SQLITE_TUNED', False)
+
+
+def is_lock_error(error):
+    return isinstance(error, OperationalError) and 'locked' in str(error)
+
+
+@contextmanager
+def write_transaction(using=None):
+    """transaction.atomic() that starts with BEGIN IMMEDIATE in tuned mode"""
+    connection = transaction.get_connection(using)
+    if not tuned(connection) or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    # Connecting reloads transaction_mode from OPTIONS, so connect first
+    connection.ensure_connection()
+    mode = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            connection.transaction_mode = mode
+            yield
+    finally:
+        connection.transaction_mode = mode
+
+
+def retry_on_lock(func):
+    """
+    Rerun func, which must be one whole transaction, while it fails with
+    "database is locked": up to SQLITE_LOCK_RETRIES times, sleeping
+    SQLITE_LOCK_BACKOFF seconds doubled on each retry, with jitter.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        connection = transaction.get_connection()
+        if not tuned(connection) or connection.in_atomic_block:
+            return func(*args, **kwargs)
+        delay = getattr(settings, 'SQLITE_LOCK_BACKOFF', 0.05)
+        for attempt in range(getattr(settings, 'SQLITE_LOCK_RETRIES', 5)):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                if not is_lock_error(e):
+                    raise
+            time.sleep(delay * 2 ** attempt * random.uniform(0.5, 1.5))
+        return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,151 @@
+# bikes/stats.py
+"""
+Owner earnings rollup.
+
+BikeMonthlyStats holds one row per bike and month: booking counts by status
+and revenue for the bookings starting that month, and the days of the month
+a pending, confirmed or completed booking holds the bike. The receivers call
+refresh_stats_for() with the (bike_id, start_date, end_date) rows that
+changed, so only the months those bookings touch are recomputed, and
+owner_stats reads the rows as they are.
+
+Archived bookings (see retention.py) still count, so archiving never moves
+the numbers.
+"""
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from .availability import add_months
+from .models import Bike, BikeMonthlyStats, Booking, BookingArchive
+from .sqlite import write_transaction
+
+EARNING_STATUSES = ('confirmed', 'completed')
+HOLDING_STATUSES = ('pending', 'confirmed', 'completed')
+COUNTED_FIELDS = ('bookings', 'pending', 'confirmed', 'completed', 'cancelled', 'booked_days')
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def days_in_month(month):
+    return calendar.monthrange(month.year, month.month)[1]
+
+
+def months_between(start_date, end_date):
+    """First days of the months touched by [start_date, end_date)"""
+    month, last = month_start(start_date), month_start(max(end_date - timedelta(days=1), start_date))
+    months = []
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def _empty():
+    return {**dict.fromkeys(COUNTED_FIELDS, 0), 'revenue': Decimal('0.00')}
+
+
+def refresh_stats(bike_id, months):
+    """
+    Recompute one bike's rows for the given months.
+
+    Only bookings overlapping those months are read, so the cost follows the
+    change rather than the bike's history.
+    """
+    months = sorted(set(months))
+    if not months:
+        return
+    window_start, window_end = months[0], add_months(months[-1], 1)
+    cells = {month: _empty() for month in months}
+
+    with write_transaction():
+        if not Bike.objects.filter(pk=bike_id).exists():
+            return  # bike is being deleted
+        for model in (Booking, BookingArchive):
+            rows = model.objects.filter(
+                bike_id=bike_id, start_date__lt=window_end, end_date__gt=window_start,
+            ).values_list('start_date', 'end_date', 'status', 'total_price')
+            for start, end, status, price in rows:
+                cell = cells.get(month_start(start))
+                if cell is not None:
+                    cell['bookings'] += 1
+                    cell[status] += 1
+                    if status in EARNING_STATUSES:
+                        cell['revenue'] += price
+                if status in HOLDING_STATUSES:
+                    for month, cell in cells.items():
+                        first, last = max(start, month), min(end, add_months(month, 1))
+                        if last > first:
+                            cell['booked_days'] += (last - first).days
+
+        empty = [month for month, cell in cells.items() if not cell['bookings'] and not cell['booked_days']]
+        BikeMonthlyStats.objects.filter(bike_id=bike_id, month__in=empty).delete()
+        for month, cell in cells.items():
+            if month not in empty:
+                BikeMonthlyStats.objects.update_or_create(bike_id=bike_id, month=month, defaults=cell)
+
+
+def refresh_stats_for(bookings):
+    """Refresh the rollup for (bike_id, start_date, end_date) rows, one pass per bike"""
+    by_bike = defaultdict(set)
+    for bike_id, start, end in bookings:
+        by_bike[bike_id].update(months_between(start, end))
+    for bike_id, months in by_bike.items():
+        refresh_stats(bike_id, months)
+
+
+def rebuild_stats(bike_ids=None):
+    """Recompute the rollup from scratch (for the given bikes, or all)"""
+    rows = []
+    for model in (Booking, BookingArchive):
+        bookings = model.objects.all()
+        if bike_ids is not None:
+            bookings = bookings.filter(bike_id__in=bike_ids)
+        rows += bookings.values_list('bike_id', 'start_date', 'end_date')
+    stale = BikeMonthlyStats.objects.all()
+    if bike_ids is not None:
+        stale = stale.filter(bike_id__in=bike_ids)
+    stale.delete()
+    refresh_stats_for(rows)
+
+
+def _summary(cell, days):
+    return {
+        **{field: cell[field] for field in COUNTED_FIELDS},
+        'revenue': str(cell['revenue']),
+        'utilization': round(cell['booked_days'] / days, 4) if days else 0.0,
+    }
+
+
+def owner_stats(owner, first_month, last_month):
+    """Per-bike, per-month figures of an owner's bikes in [first_month, last_month], from the rollup"""
+    months = months_between(first_month, add_months(last_month, 1))
+    period_days = sum(days_in_month(month) for month in months)
+    rows = defaultdict(dict)
+    for row in BikeMonthlyStats.objects.filter(
+        bike__owner=owner, month__gte=months[0], month__lte=months[-1],
+    ).values('bike_id', 'month', 'revenue', *COUNTED_FIELDS):
+        rows[row.pop('bike_id')][row.pop('month')] = row
+
+    bikes, overall = [], _empty()
+    for bike in Bike.objects.filter(owner=owner).order_by('id').values('id', 'title'):
+        total, per_month = _empty(), []
+        for month in months:
+            cell = rows[bike['id']].get(month, _empty())
+            for field in total:
+                total[field] += cell[field]
+            per_month.append({'month': f'{month:%Y-%m}', **_summary(cell, days_in_month(month))})
+        for field in overall:
+            overall[field] += total[field]
+        bikes.append({'bike': bike['id'], 'title': bike['title'], **_summary(total, period_days),
+                      'months': per_month})
+
+    return {
+        'from': f'{months[0]:%Y-%m}',
+        'to': f'{months[-1]:%Y-%m}',
+        'totals': _summary(overall, period_days * len(bikes)),
+        'bikes': bikes,
+    }
@@ -0,0 +1,184 @@
+# bikes/storage.py
+"""
+Content-addressed media storage.
+
+Every upload is stored once under the SHA-256 of its bytes,
+
+    blobs/<first two hex digits>/<sha256><ext>
+
+whatever upload_to or file name it came with, so the same photo used for
+several listings, or the same Aadhaar scan uploaded again, is one file.
+MediaBlob counts how many Bike / UserProfile fields (processed image
+variants included) point at each blob; the receivers keep the counts up to
+date and a blob whose count drops to zero is deleted after commit.
+``manage.py collect_media`` recounts from the rows and removes anything
+left behind.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import timedelta
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import MediaBlob
+
+BLOB_PREFIX = 'blobs'
+TEMP_SUFFIX = '.upload'
+
+# Models whose file fields live in the blob store
+TRACKED_MODELS = ('bikes.Bike', 'bikes.UserProfile')
+
+
+def grace_period():
+    # Blobs stored this recently are left alone: the row that will reference
+    # them may not have been saved yet
+    return timedelta(seconds=getattr(settings, 'MEDIA_BLOB_GRACE_SECONDS', 300))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that deduplicates by content; see the module docstring"""
+
+    def _save(self, name, content):
+        ext = os.path.splitext(name)[1].lower()
+        directory = self.path(BLOB_PREFIX)
+        os.makedirs(directory, exist_ok=True)
+
+        # Hash while copying to a temporary file next to the blobs, so the
+        # upload is never held in memory and the final move is atomic
+        digest, size = hashlib.sha256(), 0
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=TEMP_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            sha256 = digest.hexdigest()
+            name = f'{BLOB_PREFIX}/{sha256[:2]}/{sha256}{ext}'
+
+            # The row lock orders this against collect() deleting the same blob
+            with transaction.atomic():
+                blob, created = MediaBlob.objects.select_for_update().get_or_create(
+                    name=name, defaults={'sha256': sha256, 'size': size},
+                )
+                if not created:
+                    MediaBlob.objects.filter(pk=name).update(touched_at=timezone.now())
+                path = self.path(name)
+                if os.path.exists(path):
+                    os.unlink(tmp_path)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return name
+
+    def delete(self, name):
+        """Blobs are only deleted once nothing references them"""
+        if name and name.startswith(BLOB_PREFIX + '/'):
+            self.collect([name])
+        else:
+            super().delete(name)
+
+    def collect(self, names=None):
+        """Delete unreferenced blobs past the grace period (only those in names, if given)"""
+        cutoff = timezone.now() - grace_period()
+        with transaction.atomic():
+            blobs = MediaBlob.objects.select_for_update().filter(references=0, touched_at__lte=cutoff)
+            if names is not None:
+                blobs = blobs.filter(name__in=list(names))
+            doomed = list(blobs.values_list('name', flat=True))
+            MediaBlob.objects.filter(name__in=doomed).delete()
+            for name in doomed:
+                super().delete(name)
+        return doomed
+
+    def orphans(self):
+        """Files under the blob directory with no MediaBlob row, past the grace period"""
+        root = self.path(BLOB_PREFIX)
+        cutoff = time.time() - grace_period().total_seconds()
+        known = set(MediaBlob.objects.values_list('name', flat=True))
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.location).replace(os.sep, '/')
+                if name not in known and os.path.getmtime(path) <= cutoff:
+                    yield name
+
+    def delete_orphans(self):
+        names = list(self.orphans())
+        for name in names:
+            super().delete(name)
+        return names
+
+
+# Reference counting
+
+def tracked_fields(model):
+    names = [f.attname for f in model._meta.concrete_fields if isinstance(f, models.FileField)]
+    if any(f.name == 'processed_images' for f in model._meta.concrete_fields):
+        names.append('processed_images')
+    return names
+
+
+def references(values):
+    """Counter of stored names a row points at, from its tracked field values"""
+    names = Counter()
+    for field, value in values.items():
+        if field == 'processed_images':
+            for entry in (value or {}).values():
+                for formats in entry.get('variants', {}).values():
+                    names.update(formats.values())
+        else:
+            name = getattr(value, 'name', value)
+            if name:
+                names[name] += 1
+    return names
+
+
+def references_of(instance):
+    return references({field: getattr(instance, field) for field in tracked_fields(type(instance))})
+
+
+def stored_references(model, pk):
+    """references() of the row as currently saved"""
+    values = model.objects.filter(pk=pk).values(*tracked_fields(model)).first()
+    return references(values) if values else Counter()
+
+
+def update_references(old, new):
+    """Move reference counts from the names in old to those in new"""
+    for name, count in (new - old).items():
+        MediaBlob.objects.filter(pk=name).update(references=F('references') + count)
+    released = old - new
+    for name, count in released.items():
+        MediaBlob.objects.filter(pk=name, references__gte=count).update(references=F('references') - count)
+    if released and isinstance(default_storage, ContentAddressedStorage):
+        transaction.on_commit(partial(default_storage.collect, list(released)))
+
+
+def recount():
+    """Reset every blob's count from the rows; returns the number of blobs corrected"""
+    counts = Counter()
+    for label in TRACKED_MODELS:
+        model = apps.get_model(label)
+        for values in model.objects.values(*tracked_fields(model)).iterator():
+            counts.update(references(values))
+    corrected = 0
+    for name, stored in MediaBlob.objects.values_list('name', 'references'):
+        if stored != counts[name]:
+            corrected += MediaBlob.objects.filter(pk=name).update(references=counts[name])
+    return corrected
@@ -0,0 +1,169 @@
+# bikes/uploads.py
+"""
+Resumable chunked uploads.
+
+    POST /api/uploads/                  {"filename", "size"} -> {"id", "offset": 0, ...}
+    PUT  /api/uploads/<id>/?offset=N    raw bytes, appended at N -> {"offset": N + len}
+    GET  /api/uploads/<id>/             current offset, to resume after a failure
+    POST /api/uploads/<id>/finalize/    {"sha256"} optional checksum -> completed
+
+Chunks are copied from the request stream straight into a part file under
+CHUNKED_UPLOAD_DIR. A completed upload is attached by id, e.g.
+``image_upload`` on a bike or ``upload_id`` on upload-aadhaar, and is
+removed once the row it was attached to is committed.
+"""
+import hashlib
+import os
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File, locks
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from .models import ChunkedUpload
+
+COPY_BUFFER = 64 * 1024
+
+
+class OffsetMismatch(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Chunk offset does not match the upload offset.'
+    default_code = 'offset_mismatch'
+
+
+def max_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 50 * 1024 * 1024)
+
+
+def max_chunk_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_CHUNK', 8 * 1024 * 1024)
+
+
+def part_path(upload_id):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{upload_id}.part')
+
+
+def append_chunk(upload, stream, length, offset):
+    """Write length bytes from stream at offset; returns the upload with its new offset"""
+    if length > max_chunk_size():
+        raise serializers.ValidationError({'chunk': f'Chunks may be at most {max_chunk_size()} bytes.'})
+
+    path = part_path(upload.pk)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    with open(path, 'ab') as part:
+        # A file lock rather than a row lock: no transaction stays open
+        # while the chunk trickles in
+        locks.lock(part, locks.LOCK_EX)
+        try:
+            upload.refresh_from_db(fields=['offset', 'completed_at'])
+            if upload.completed_at:
+                raise serializers.ValidationError({'upload': 'This upload is already finalized.'})
+            if offset != upload.offset:
+                raise OffsetMismatch(f'Expected offset {upload.offset}.')
+            if offset + length > upload.size:
+                raise serializers.ValidationError({'chunk': 'Chunk runs past the declared size.'})
+
+            # Drop any tail a failed request wrote past the recorded offset
+            part.truncate(offset)
+            while written < length:
+                data = stream.read(min(COPY_BUFFER, length - written)) if stream else b''
+                if not data:
+                    break
+                part.write(data)
+                written += len(data)
+            part.flush()
+            # Whatever arrived counts, so a broken chunk resumes where it stopped
+            upload.offset = offset + written
+            upload.updated_at = timezone.now()
+            ChunkedUpload.objects.filter(pk=upload.pk).update(offset=upload.offset, updated_at=upload.updated_at)
+        finally:
+            locks.unlock(part)
+
+    if written < length:
+        raise serializers.ValidationError(
+            {'chunk': f'Chunk ended after {written} of {length} bytes; resume at {upload.offset}.'}
+        )
+    return upload
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(partial(f.read, COPY_BUFFER), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize(upload, sha256=''):
+    if upload.completed_at:
+        return upload
+    if upload.offset != upload.size:
+        raise serializers.ValidationError(
+            {'upload': f'Only {upload.offset} of {upload.size} bytes have been received.'}
+        )
+    path = part_path(upload.pk)
+    if not upload.size:
+        open(path, 'ab').close()
+    digest = file_sha256(path)
+    if sha256 and sha256.lower() != digest:
+        raise serializers.ValidationError({'sha256': 'Checksum does not match the uploaded bytes.'})
+    upload.sha256 = digest
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['sha256', 'completed_at', 'updated_at'])
+    return upload
+
+
+def completed_upload(user, upload_id, image=False):
+    """The user's finalized upload with this id, for attaching to a file field"""
+    upload_id = serializers.UUIDField().to_internal_value(upload_id)
+    upload = ChunkedUpload.objects.filter(
+        pk=upload_id, user=user, completed_at__isnull=False,
+    ).first()
+    if upload is None:
+        raise serializers.ValidationError('No finalized upload with this id.')
+    if image:
+        try:
+            with Image.open(part_path(upload.pk)) as picture:
+                picture.verify()
+        except Exception:
+            raise serializers.ValidationError('Upload a valid image.')
+    return upload
+
+
+@contextmanager
+def attach(upload):
+    """Open a completed upload as a File to assign to a FileField and save"""
+    with open(part_path(upload.pk), 'rb') as f:
+        yield File(f, name=upload.filename)
+    transaction.on_commit(partial(discard, upload.pk))
+
+
+def discard(upload_id):
+    ChunkedUpload.objects.filter(pk=upload_id).delete()
+    path = part_path(upload_id)
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def expire():
+    """Remove uploads untouched for CHUNKED_UPLOAD_EXPIRY_HOURS and stray part files"""
+    cutoff = timezone.now() - timedelta(hours=getattr(settings, 'CHUNKED_UPLOAD_EXPIRY_HOURS', 24))
+    stale = list(ChunkedUpload.objects.filter(updated_at__lt=cutoff).values_list('pk', flat=True))
+    for upload_id in stale:
+        discard(upload_id)
+
+    directory = settings.CHUNKED_UPLOAD_DIR
+    if os.path.isdir(directory):
+        known = {f'{pk}.part' for pk in ChunkedUpload.objects.values_list('pk', flat=True)}
+        for filename in os.listdir(directory):
+            path = os.path.join(directory, filename)
+            if filename not in known and os.path.getmtime(path) < cutoff.timestamp():
+                os.unlink(path)
+    return len(stale)
@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'bikes', views.BikeViewSet)
 router.register(r'bookings', views.BookingViewSet)
+router.register(r'uploads', views.ChunkedUploadViewSet)
+router.register(r'seasonal-rates', views.SeasonalRateViewSet)
 
 urlpatterns = [
     # Authentication
@@ -14,6 +16,14 @@ urlpatterns = [
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/profile/', views.get_user_profile, name='user_profile'),
     
+    # Async-native reads and OTP, for ASGI deployments (see bikes/async_views.py)
+    path('async/bikes/', async_views.bike_list, name='async-bike-list'),
+    path('async/bikes/<int:pk>/', async_views.bike_detail, name='async-bike-detail'),
+    path('async/bookings/my_bookings/', async_views.my_bookings, name='async-my-bookings'),
+    path('async/bookings/my_rentals/', async_views.my_rentals, name='async-my-rentals'),
+    path('async/send-otp/', async_views.send_otp, name='async-send-otp'),
+    path('async/verify-otp/', async_views.verify_otp, name='async-verify-otp'),
+
     # Router URLs
     path('', include(router.urls)),
     path('', include(router.urls)),
@@ -23,4 +33,6 @@ urlpatterns = [
     path('verify-otp/', views.verify_otp, name='verify-otp'),
     path('upload-aadhaar/', views.upload_aadhaar, name='upload-aadhaar'),
     path('user-profile/', views.user_profile, name='user-profile'),
+    path('cache-stats/', views.cache_stats, name='cache-stats'),
+    path('export/<str:kind>.<str:fmt>', views.export_data, name='export'),
 ]
\ No newline at end of file
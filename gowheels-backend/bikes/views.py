@@ -1,11 +1,32 @@
-from rest_framework import viewsets, status
+from contextlib import ExitStack
+from datetime import timedelta
+
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.throttling import BaseThrottle
 from django.contrib.auth.models import User
-from .models import Bike, Booking, UserProfile, OTPVerification
-from .serializers import BikeSerializer, BookingSerializer, UserSerializer, UserProfileSerializer
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.http import Http404
+from .models import Bike, Booking, BookingArchive, ChunkedUpload, SeasonalRate, UserProfile
+from .serializers import (
+    BikeSerializer, BookingArchiveSerializer, BookingSerializer, BookingTransitionSerializer, ChunkedUploadSerializer,
+    SeasonalRateSerializer, TripSerializer, UserSerializer, UserProfileSerializer,
+)
 from .otp_service import OTPService
+from .booking_service import BookingService
+from .pagination import ArchiveCursorPagination, BikeCursorPagination
+from .filters import BikeFilterBackend, deciding_bookings, parse_day
+from .availability import add_months, occupancy_calendar
+from . import cache as response_cache
+from .conditional import conditional_read
+from .db_router import ReplicaReadsMixin
+from .fast_serializers import BikeRows, BookingRows
+from .fieldsets import Shape, BIKE_RELATIONS, BOOKING_RELATIONS
+from . import export, fleet_import, geo, pricing, stats, uploads
 
 from .serializers import (
     UserSerializer, RegisterSerializer, 
@@ -32,51 +53,279 @@ def get_user_profile(request):
     return Response(serializer.data)
 
 # Bike ViewSet
-class BikeViewSet(viewsets.ModelViewSet):
+class BikeViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     queryset = Bike.objects.all()
     serializer_class = BikeSerializer
+    pagination_class = BikeCursorPagination
+    filter_backends = [BikeFilterBackend]
+    
+    def get_queryset(self):
+        return super().get_queryset().select_related(*self.shape.select_related(BIKE_RELATIONS))
+    
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'shape': self.shape}
+    
+    @property
+    def shape(self):
+        return Shape.from_request(self.request)
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'calendar', 'nearby', 'quote']:
             permission_classes = [AllowAny]
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
     
+    @response_cache.cache_anonymous_read('list')
+    @conditional_read(lambda view, request: view.filter_queryset(Bike.objects.all()),
+                      get_related=lambda view, request, **kwargs: deciding_bookings(request))
+    def list(self, request, *args, **kwargs):
+        rows = BikeRows(request, self.shape)
+        page = self.paginate_queryset(rows.values(self.filter_queryset(self.get_queryset())))
+        return self.get_paginated_response(rows.serialize(page))
+    
+    @response_cache.cache_anonymous_read('detail')
+    @conditional_read(lambda view, request, pk: view.filter_queryset(Bike.objects.filter(pk=pk)),
+                      get_related=lambda view, request, **kwargs: deciding_bookings(request))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    @conditional_read(lambda view, request: view.filter_queryset(Bike.objects.filter(owner=request.user)),
+                      get_related=lambda view, request, **kwargs: deciding_bookings(request))
     def my_bikes(self, request):
-        bikes = Bike.objects.filter(owner=request.user)
-        serializer = self.get_serializer(bikes, many=True)
-        return Response(serializer.data)
+        rows = BikeRows(request, self.shape)
+        bikes = self.filter_queryset(self.get_queryset().filter(owner=request.user))
+        page = self.paginate_queryset(rows.values(bikes))
+        return self.get_paginated_response(rows.serialize(page))
+    
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """Nearest bikes first: ?lat=&lng=&radius= (km)&limit=, plus the list filters"""
+        try:
+            lat = float(request.query_params['lat'])
+            lng = float(request.query_params['lng'])
+            radius = float(request.query_params.get('radius', 10))
+            limit = int(request.query_params.get('limit', 20))
+        except (KeyError, ValueError):
+            return Response({'error': 'lat and lng are required; radius and limit must be numbers'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        max_radius = getattr(settings, 'BIKE_NEARBY_MAX_RADIUS_KM', 100)
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180 and 0 < radius <= max_radius and 0 < limit <= 100):
+            return Response({'error': f'Use a valid point, a radius up to {max_radius} km and a limit up to 100'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        found = geo.nearby(self.filter_queryset(Bike.objects.all()), lat, lng, radius, limit)
+        rows = BikeRows(request, self.shape)
+        by_id = {row['id']: row for row in rows.values(self.get_queryset().filter(pk__in=[pk for pk, _ in found]))}
+        # A bike deleted since geo.nearby() found it is left out
+        results = [{**rows.build(by_id[pk]), 'distance_km': round(distance, 3)}
+                   for pk, distance in found if pk in by_id]
+        return Response({'results': results})
+    
+    @action(detail=False, methods=['post'])
+    def quote(self, request):
+        """Prices of many trips at once: {"trips": [{"bike_id", "start_date", "end_date"}, ...]}"""
+        max_trips = getattr(settings, 'PRICING_MAX_TRIPS', 200)
+        trips = request.data.get('trips') if isinstance(request.data, dict) else None
+        serializer = TripSerializer(data=trips, many=True, max_length=max_trips)
+        serializer.is_valid(raise_exception=True)
+        trips = [(trip['bike_id'], trip['start_date'], trip['end_date']) for trip in serializer.validated_data]
+        quotes = []
+        for (bike_id, _, _), quote in zip(trips, pricing.quote_many(trips)):
+            quotes.append(quote.as_dict() if quote else {'bike_id': bike_id, 'error': 'Bike not found.'})
+        return Response({'quotes': quotes})
+    
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_fleet(self, request):
+        """
+        Create many bikes at once (see bikes/fleet_import.py): a `file` (.csv or
+        .json) and optional `images` zip, each as multipart or the *_upload id
+        of a finalized chunked upload; or a JSON body {"bikes": [...]}.
+        """
+        with ExitStack() as stack:
+            try:
+                files = {}
+                for field in ('file', 'images'):
+                    if field in request.FILES:
+                        files[field] = request.FILES[field]
+                    elif request.data.get(f'{field}_upload'):
+                        upload = uploads.completed_upload(request.user, request.data[f'{field}_upload'])
+                        files[field] = stack.enter_context(uploads.attach(upload))
+                if 'file' in files:
+                    rows = fleet_import.read_rows(files['file'], files['file'].name)
+                elif isinstance(request.data.get('bikes'), list):
+                    rows = request.data['bikes']
+                else:
+                    return Response({'error': 'Send a file, a file_upload id or a list of bikes'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                images = fleet_import.ImageArchive(files['images']) if 'images' in files else None
+                report = fleet_import.import_bikes(request.user, rows, images)
+            except fleet_import.FleetFileError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['get'])
+    def calendar(self, request, pk=None):
+        """Booked and free days: ?from=YYYY-MM-DD&to=YYYY-MM-DD or ?months=N (default 3)"""
+        bike = self.get_object()
+        start = parse_day(request.query_params, 'from') or timezone.localdate()
+        end = parse_day(request.query_params, 'to')
+        try:
+            months = int(request.query_params.get('months', 3))
+        except ValueError:
+            return Response({'error': 'Use a whole number of months'}, status=status.HTTP_400_BAD_REQUEST)
+        end = end or add_months(start, max(months, 1))
+        if not start < end <= start + timedelta(days=366):
+            return Response({'error': 'to must be after from and at most a year later'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        booked, free = occupancy_calendar(bike.id, start, end)
+        return Response({
+            'bike': bike.id,
+            'from': start,
+            'to': end,
+            'booked': booked,
+            'free': free,
+        })
+
+# Chunked uploads (see bikes/uploads.py)
+class ChunkedUploadViewSet(ReplicaReadsMixin, mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                           viewsets.GenericViewSet):
+    queryset = ChunkedUpload.objects.all()
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user)
+    
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+    
+    def update(self, request, pk=None):
+        """Append the raw request body at ?offset= (or the Upload-Offset header)"""
+        upload = self.get_object()
+        try:
+            offset = int(request.query_params.get('offset', request.headers.get('Upload-Offset', '')))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({'error': 'offset must be a whole number of bytes'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        uploads.append_chunk(upload, request.stream, length, offset)
+        return Response(self.get_serializer(upload).data)
+    
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        upload = uploads.finalize(self.get_object(), request.data.get('sha256', ''))
+        return Response(self.get_serializer(upload).data)
+
+class SeasonalRateViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
+    """Owners' seasonal daily prices for their bikes (see bikes/pricing.py)"""
+    queryset = SeasonalRate.objects.all()
+    serializer_class = SeasonalRateSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = super().get_queryset().filter(bike__owner=self.request.user).order_by('bike_id', 'start_date')
+        if self.request.query_params.get('bike'):
+            queryset = queryset.filter(bike_id=self.request.query_params['bike'])
+        return queryset
 
 # Booking ViewSet
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
     
+    def get_queryset(self):
+        # Owners see the bookings of their bikes through my_rentals
+        queryset = super().get_queryset().filter(renter=self.request.user)
+        return queryset.select_related(*self.shape.select_related(BOOKING_RELATIONS))
+    
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'shape': self.shape}
+    
+    @property
+    def shape(self):
+        return Shape.from_request(self.request)
+    
+    def perform_update(self, serializer):
+        booking, data = serializer.instance, serializer.validated_data
+        serializer.instance = BookingService.reschedule_booking(
+            booking,
+            bike_id=data.get('bike_id', booking.bike_id),
+            start_date=data.get('start_date', booking.start_date),
+            end_date=data.get('end_date', booking.end_date),
+        )
+    
     def perform_create(self, serializer):
-        bike = Bike.objects.get(id=self.request.data['bike_id'])
-        days = (serializer.validated_data['end_date'] - serializer.validated_data['start_date']).days
-        total_price = bike.price_per_day * days
-        serializer.save(renter=self.request.user, bike=bike, total_price=total_price)
+        serializer.instance = BookingService.create_booking(
+            renter=self.request.user,
+            bike_id=serializer.validated_data['bike_id'],
+            start_date=serializer.validated_data['start_date'],
+            end_date=serializer.validated_data['end_date'],
+        )
     
     @action(detail=False, methods=['get'])
+    @conditional_read(lambda view, request: Booking.objects.filter(renter=request.user),
+                      timestamp_fields=('updated_at', 'bike__updated_at'))
     def my_bookings(self, request):
-        bookings = Booking.objects.filter(renter=request.user)
-        serializer = self.get_serializer(bookings, many=True)
-        return Response(serializer.data)
+        rows = BookingRows(request, self.shape)
+        return Response(rows.serialize(rows.values(Booking.objects.filter(renter=request.user))))
     
     @action(detail=False, methods=['get'])
+    @conditional_read(lambda view, request: Booking.objects.filter(bike__owner=request.user),
+                      timestamp_fields=('updated_at', 'bike__updated_at'))
     def my_rentals(self, request):
-        bookings = Booking.objects.filter(bike__owner=request.user)
-        serializer = self.get_serializer(bookings, many=True)
-        return Response(serializer.data)
+        rows = BookingRows(request, self.shape)
+        return Response(rows.serialize(rows.values(Booking.objects.filter(bike__owner=request.user))))
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def transition(self, request):
+        """Bulk status change {"ids": [...], "status": ...}, with a result per id"""
+        serializer = BookingTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = BookingService.transition_many(serializer.validated_data['ids'], serializer.validated_data['status'])
+        succeeded = sum(result['ok'] for result in results)
+        return Response({'ok': succeeded, 'failed': len(results) - succeeded, 'results': results})
+    
+    @action(detail=False, methods=['get'])
+    def archived(self, request):
+        """Archived bookings (see bikes/retention.py): ?role=renter (default) or ?role=owner"""
+        archive = BookingArchive.objects.select_related('bike')
+        if request.query_params.get('role') == 'owner':
+            archive = archive.filter(bike__owner=request.user)
+        else:
+            archive = archive.filter(renter=request.user)
+        paginator = ArchiveCursorPagination()
+        page = paginator.paginate_queryset(archive, request, view=self)
+        return paginator.get_paginated_response(BookingArchiveSerializer(page, many=True).data)
+    
+    @action(detail=False, methods=['get'])
+    def owner_stats(self, request):
+        """Revenue, utilization and booking counts of the user's bikes per month: ?from=YYYY-MM&to=YYYY-MM"""
+        try:
+            last = parse_date(request.query_params['to'] + '-01') if 'to' in request.query_params \
+                else stats.month_start(timezone.localdate())
+            first = parse_date(request.query_params['from'] + '-01') if 'from' in request.query_params \
+                else add_months(last, -11)
+        except ValueError:
+            last = first = None
+        if not first or not last:
+            return Response({'error': 'Use YYYY-MM months'}, status=status.HTTP_400_BAD_REQUEST)
+        if not first <= last < add_months(first, 36):
+            return Response({'error': 'to must not be before from and at most 36 months later'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(stats.owner_stats(request.user, first, last))
 
 # NEW: OTP Views
+def client_ip(request):
+    # Same client identity DRF throttles use (honours NUM_PROXIES)
+    return BaseThrottle().get_ident(request)
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def send_otp(request):
@@ -94,14 +343,8 @@ def send_otp(request):
             'error': 'This phone number is already registered'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Generate OTP
-    otp = OTPService.generate_otp()
-    
-    # Save OTP to database
-    OTPVerification.objects.create(
-        phone_number=phone_number,
-        otp=otp
-    )
+    # Generate OTP (rate limited per phone and per client)
+    otp = OTPService.issue(phone_number, client_ip(request))
     
     # Send OTP via MSG91
     sent = OTPService.send_otp_msg91(phone_number, otp)
@@ -124,59 +367,49 @@ def verify_otp(request):
     otp = request.data.get('otp')
     user_id = request.data.get('user_id')  # Optional: if user already exists
     
-    try:
-        otp_record = OTPVerification.objects.filter(
-            phone_number=phone_number,
-            otp=otp,
-            is_verified=False
-        ).latest('created_at')
-        
-        if not otp_record.is_valid():
-            return Response({
-                'error': 'OTP expired. Please request a new one.'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Mark as verified
-        otp_record.is_verified = True
-        otp_record.save()
-        
-        # Create or update user profile
-        if user_id:
-            try:
-                user = User.objects.get(id=user_id)
-                profile, created = UserProfile.objects.get_or_create(user=user)
-                profile.phone_number = phone_number
-                profile.phone_verified = True
-                profile.save()
-            except User.DoesNotExist:
-                return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        return Response({
-            'message': 'Phone number verified successfully! ✅',
-            'verified': True
-        }, status=status.HTTP_200_OK)
-        
-    except OTPVerification.DoesNotExist:
+    if not phone_number or not otp or not OTPService.verify(phone_number, otp, client_ip(request)):
         return Response({
-            'error': 'Invalid OTP. Please try again.'
+            'error': 'Invalid or expired OTP. Please try again or request a new one.'
         }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Create or update user profile
+    if user_id:
+        try:
+            user = User.objects.get(id=user_id)
+            profile, created = UserProfile.objects.get_or_create(user=user)
+            profile.phone_number = phone_number
+            profile.phone_verified = True
+            profile.save()
+        except User.DoesNotExist:
+            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'message': 'Phone number verified successfully! ✅',
+        'verified': True
+    }, status=status.HTTP_200_OK)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_aadhaar(request):
-    """Upload Aadhaar Card"""
+    """Upload Aadhaar Card, as a file or the upload_id of a finalized chunked upload"""
     aadhaar_image = request.FILES.get('aadhaar_card')
+    upload_id = request.data.get('upload_id')
     
-    if not aadhaar_image:
+    if not aadhaar_image and not upload_id:
         return Response({
             'error': 'Aadhaar card image required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
     # Get or create user profile
     profile, created = UserProfile.objects.get_or_create(user=request.user)
-    profile.aadhaar_card = aadhaar_image
     profile.aadhaar_verified = False  # Pending admin verification
-    profile.save()
+    if aadhaar_image:
+        profile.aadhaar_card = aadhaar_image
+        profile.save()
+    else:
+        with uploads.attach(uploads.completed_upload(request.user, upload_id, image=True)) as aadhaar_image:
+            profile.aadhaar_card = aadhaar_image
+            profile.save()
     
     return Response({
         'message': '✅ Aadhaar card uploaded successfully! We will verify it soon.',
@@ -194,4 +427,28 @@ def user_profile(request):
     except UserProfile.DoesNotExist:
         return Response({
             'message': 'Profile not complete. Please verify phone number.'
-        }, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        }, status=status.HTTP_404_NOT_FOUND)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """Hit/miss counters of the anonymous bike response cache"""
+    return Response(response_cache.stats())
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_data(request, kind, fmt):
+    """Stream bookings or bikes as CSV / NDJSON: ?from=&to=YYYY-MM-DD&status=a,b&archived=1"""
+    if kind not in export.EXPORTS or fmt not in export.STREAMS:
+        raise Http404
+    params = request.query_params
+    date_from, date_to = parse_day(params, 'from'), parse_day(params, 'to')
+    try:
+        querysets = export.EXPORTS[kind].querysets(
+            date_from, date_to,
+            statuses=[s for s in params.get('status', '').split(',') if s],
+            archived=params.get('archived') in ('1', 'true'),
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return export.response(kind, fmt, querysets)
@@ -3,6 +3,12 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+ASGI mode, e.g. ``uvicorn core.asgi:application --workers 4`` (or gunicorn
+with ``-k uvicorn.workers.UvicornWorker``), serves the whole API. The
+async-native endpoints under /api/async/ (bikes/async_views.py) wait on the
+database without holding a thread; the DRF views run on threads as under
+WSGI. ``manage.py bench_asgi`` compares this mode with core.wsgi.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
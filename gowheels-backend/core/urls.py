@@ -17,11 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from bikes.media import serve_media
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('bikes.urls')),
+    # Media files, with ranges, validators and optional sendfile offload (see bikes/media.py)
+    path(settings.MEDIA_URL.lstrip('/') + '<path:path>', serve_media, name='media'),
 ]
-# Serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,5 +1,5 @@
 import React, { useState } from 'react';
-import { createBike } from '../services/api';
+import { createBike, uploadInChunks } from '../services/api';
 import { useNavigate, Link } from 'react-router-dom';
 import './AddBike.css';
 
@@ -72,12 +72,13 @@ function AddBike() {
       data.append('number_plate', formData.number_plate);
       data.append('available', formData.available);
       
+      // Photos go up in resumable chunks first; the bike refers to them by upload id
       if (image) {
-        data.append('image', image);
+        data.append('image_upload', await uploadInChunks(image));
       }
 
       if (numberPlateImage) {
-        data.append('number_plate_image', numberPlateImage);
+        data.append('number_plate_image_upload', await uploadInChunks(numberPlateImage));
       }
 
       await createBike(data);
@@ -1,12 +1,13 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { getBike, deleteBike, createBooking } from '../services/api';
+import { getBike, getBikeCalendar, deleteBike, createBooking } from '../services/api';
 import './BikeDetails.css';
 
 const BikeDetails = () => {
   const { id } = useParams();
   const navigate = useNavigate();
   const [bike, setBike] = useState(null);
+  const [bookedRanges, setBookedRanges] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [isOwner, setIsOwner] = useState(false);
@@ -21,9 +22,33 @@ const BikeDetails = () => {
 
   useEffect(() => {
     fetchBikeDetails();
+    fetchCalendar();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [id]);
 
+  // Booked days of the next 3 months (from the occupancy bitmap), merged into ranges
+  const fetchCalendar = async () => {
+    try {
+      const response = await getBikeCalendar(id, { months: 3 });
+      const ranges = [];
+      (response.data?.booked || []).forEach((day) => {
+        const last = ranges[ranges.length - 1];
+        const next = last && new Date(`${last.end}T00:00:00Z`);
+        if (next) next.setUTCDate(next.getUTCDate() + 1);
+        if (next && next.toISOString().slice(0, 10) === day) {
+          last.end = day;
+        } else {
+          ranges.push({ start: day, end: day });
+        }
+      });
+      setBookedRanges(ranges);
+    } catch (err) {
+      setBookedRanges(null);
+    }
+  };
+
+  const formatDay = (day) => new Date(`${day}T00:00:00`).toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
+
   const fetchBikeDetails = async () => {
     try {
       setLoading(true);
@@ -217,6 +242,21 @@ const BikeDetails = () => {
               </div>
             </div>
 
+            {bookedRanges && (
+              <div className="detail-item">
+                <div className="detail-content">
+                  <div className="detail-label">Booked (next 3 months)</div>
+                  <div className="detail-value">
+                    {bookedRanges.length === 0
+                      ? 'No bookings yet'
+                      : bookedRanges.map(({ start, end }) => (
+                          start === end ? formatDay(start) : `${formatDay(start)} – ${formatDay(end)}`
+                        )).join(', ')}
+                  </div>
+                </div>
+              </div>
+            )}
+
             {/* Owner Section */}
             <div className="owner-section">
               <h3 className="owner-title">
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import { getBikes } from '../services/api';
+import { getBikes, getBikesPage } from '../services/api';
 import { normalizeBike } from '../utils/normalizeBike';
 import './BikesList.css';
 
@@ -8,6 +8,9 @@ const BikesList = () => {
   const [bikes, setBikes] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [next, setNext] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [moreError, setMoreError] = useState(null);
   // use Link for navigation instead of imperative navigate
 
   useEffect(() => {
@@ -18,7 +21,8 @@ const BikesList = () => {
     try {
       setLoading(true);
       const response = await getBikes();
-      setBikes(response.data);
+      setBikes(response.data.results ?? response.data);
+      setNext(response.data.next ?? null);
       setLoading(false);
     } catch (err) {
       setError('Failed to load bikes. Please try again later.');
@@ -26,6 +30,20 @@ const BikesList = () => {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      setMoreError(null);
+      const response = await getBikesPage(next);
+      setBikes((current) => [...current, ...response.data.results]);
+      setNext(response.data.next);
+    } catch (err) {
+      setMoreError('Failed to load more bikes. Please try again.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div className="bikes-list-loading">
@@ -51,33 +69,41 @@ const BikesList = () => {
   }
 
   return (
-    <div className="bikes-list-container">
-      {bikes.map((raw) => {
-        const b = normalizeBike(raw);
-        const bikeId = b.id;
-        return (
-          <Link to={`/bike/${bikeId}`} key={bikeId} className="bike-card-link">
-            <div className="bike-card">
-              <div className="bike-image-wrapper">
-                <img
-                  src={b.image || 'https://images.unsplash.com/photo-1571333250630-f0230c320b6d?w=800'}
-                  alt={b.title}
-                  className="bike-image"
-                />
-                <div className={`bike-status ${b.available ? 'available' : 'unavailable'}`}>
-                  {b.available ? 'Available' : 'Not Available'}
+    <>
+      <div className="bikes-list-container">
+        {bikes.map((raw) => {
+          const b = normalizeBike(raw);
+          const bikeId = b.id;
+          return (
+            <Link to={`/bike/${bikeId}`} key={bikeId} className="bike-card-link">
+              <div className="bike-card">
+                <div className="bike-image-wrapper">
+                  <img
+                    src={b.thumbnail || 'https://images.unsplash.com/photo-1571333250630-f0230c320b6d?w=800'}
+                    alt={b.title}
+                    className="bike-image"
+                  />
+                  <div className={`bike-status ${b.available ? 'available' : 'unavailable'}`}>
+                    {b.available ? 'Available' : 'Not Available'}
+                  </div>
+                </div>
+                <div className="bike-info">
+                  <h3 className="bike-title">{b.title}</h3>
+                  <p className="bike-location">{b.location}</p>
+                  <p className="bike-price">₹{b.price_per_day} / day</p>
                 </div>
               </div>
-              <div className="bike-info">
-                <h3 className="bike-title">{b.title}</h3>
-                <p className="bike-location">{b.location}</p>
-                <p className="bike-price">₹{b.price_per_day} / day</p>
-              </div>
-            </div>
-          </Link>
-        );
-      })}
-    </div>
+            </Link>
+          );
+        })}
+      </div>
+      {moreError && <div className="bikes-list-error">{moreError}</div>}
+      {next && (
+        <button className="bikes-list-more" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? 'Loading...' : 'Load more bikes'}
+        </button>
+      )}
+    </>
   );
 };
 
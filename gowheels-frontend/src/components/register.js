@@ -57,7 +57,7 @@ function Register() {
       setStep('otp'); // Move to OTP verification step
       setError('');
     } catch (err) {
-      setError(err.response?.data?.error || 'Failed to send OTP. Please try again.');
+      setError(err.response?.data?.error || err.response?.data?.detail || 'Failed to send OTP. Please try again.');
     } finally {
       setLoading(false);
     }
@@ -78,7 +78,7 @@ function Register() {
       alert('✅ Registration and phone verification successful! Please login.');
       navigate('/login');
     } catch (err) {
-      setError(err.response?.data?.error || 'Invalid OTP. Please try again.');
+      setError(err.response?.data?.error || err.response?.data?.detail || 'Invalid OTP. Please try again.');
     } finally {
       setLoading(false);
     }
@@ -32,16 +32,45 @@ export const uploadAadhaar = (formData) => api.post('/upload-aadhaar/', formData
 });
 export const getUserVerificationStatus = () => api.get('/user-profile/');
 
+// Resumable chunked uploads: returns the upload id to send as image_upload,
+// number_plate_image_upload or upload_id (Aadhaar)
+const CHUNK_SIZE = 1024 * 1024;
+export const uploadInChunks = async (file, { onProgress, retries = 5 } = {}) => {
+  const { data } = await api.post('/uploads/', { filename: file.name, size: file.size });
+  let offset = 0;
+  let failures = 0;
+  while (offset < file.size) {
+    try {
+      const chunk = file.slice(offset, offset + CHUNK_SIZE);
+      const response = await api.put(`/uploads/${data.id}/`, chunk, {
+        params: { offset },
+        headers: { 'Content-Type': 'application/octet-stream' },
+      });
+      offset = response.data.offset;
+      failures = 0;
+      if (onProgress) onProgress(offset / file.size);
+    } catch (err) {
+      if (++failures > retries) throw err;
+      // Resume from whatever the server kept
+      offset = (await api.get(`/uploads/${data.id}/`)).data.offset;
+    }
+  }
+  await api.post(`/uploads/${data.id}/finalize/`);
+  return data.id;
+};
+
 // Bike functions
-export const getBikes = () => api.get('/bikes/');
+export const getBikes = (params = {}) => api.get('/bikes/', { params });
+// The bike list is cursor-paginated: pass the `next` URL of the previous page
+export const getBikesPage = (url) => api.get(url);
 export const getBike = (id) => api.get(`/bikes/${id}/`);
+export const getBikeCalendar = (id, params = {}) => api.get(`/bikes/${id}/calendar/`, { params });
 export const createBike = (bikeData) => {
   // bikeData should be FormData for file uploads
   return api.post('/bikes/', bikeData, {
     headers: { 'Content-Type': 'multipart/form-data' }
   });
 };
-export const getMyBikes = () => api.get('/bikes/my_bikes/');
 export const deleteBike = (id) => api.delete(`/bikes/${id}/`);
 
 // Booking functions